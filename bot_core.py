@@ -123,7 +123,19 @@ except ImportError as e:
         logger.debug(f"管理后台模块未正确导入，状态更新被忽略: {status}")
 
 
+# 当前运行的机器人实例，供进程重启前关闭使用
+_xybot = None
+
+
+async def close_xybot():
+    """写完未落库的消息记录并关闭机器人的HTTP会话，在重启进程前调用"""
+    if _xybot is not None:
+        await _xybot.aclose()
+
+
 async def bot_core():
+    global _xybot
+
     # 设置工作目录
     script_dir = Path(__file__).resolve().parent
     os.chdir(script_dir)
@@ -539,6 +551,7 @@ async def bot_core():
     # 初始化机器人
     xybot = XYBot(bot)
     xybot.update_profile(bot.wxid, bot.nickname, bot.alias, bot.phone)
+    _xybot = xybot
 
     # 设置机器人实例到管理后台
     set_bot_instance(xybot)
@@ -599,89 +612,93 @@ async def bot_core():
     max_failure_count = 3  # 连续失败超过这个数量则认为离线
     is_offline = False
 
-    while True:
-        # 不需要记录当前时间
+    try:
+        while True:
+            # 不需要记录当前时间
 
-        try:
-            ok,data = await bot.sync_message()
-
-            # 如果成功获取消息，重置失败计数
-            if ok:
-                # 如果之前处于离线状态，现在恢复了，发送重连通知
-                if is_offline and message_failure_count > 0:
-                    is_offline = False
-                    message_failure_count = 0
-
-                    # 发送重连通知
-                    notification_service = get_notification_service()
-                    if notification_service and notification_service.enabled and notification_service.triggers.get("reconnect", False):
-                        if notification_service.token:
-                            logger.info(f"发送微信重连通知，微信ID: {bot.wxid}")
-                            asyncio.create_task(notification_service.send_reconnect_notification(bot.wxid))
-                        else:
-                            logger.warning("PushPlus Token未设置，无法发送重连通知")
-
-                # 正常情况下重置计数器
-                if message_failure_count > 0:
-                    message_failure_count = 0
+            try:
+                ok,data = await bot.sync_message()
+
+                # 如果成功获取消息，重置失败计数
+                if ok:
+                    # 如果之前处于离线状态，现在恢复了，发送重连通知
+                    if is_offline and message_failure_count > 0:
+                        is_offline = False
+                        message_failure_count = 0
+
+                        # 发送重连通知
+                        notification_service = get_notification_service()
+                        if notification_service and notification_service.enabled and notification_service.triggers.get("reconnect", False):
+                            if notification_service.token:
+                                logger.info(f"发送微信重连通知，微信ID: {bot.wxid}")
+                                asyncio.create_task(notification_service.send_reconnect_notification(bot.wxid))
+                            else:
+                                logger.warning("PushPlus Token未设置，无法发送重连通知")
+
+                    # 正常情况下重置计数器
+                    if message_failure_count > 0:
+                        message_failure_count = 0
 
-        except Exception as e:
-            logger.warning("获取新消息失败 {}", e)
-            # 增加失败计数
-            message_failure_count += 1
-
-            # 如果连续失败超过阈值，标记为离线状态
-            if message_failure_count >= max_failure_count and not is_offline:
-                is_offline = True
-                logger.warning(f"连续 {message_failure_count} 次获取消息失败，微信可能已离线")
-
-            # 等待一段时间后重试
-            await asyncio.sleep(5)
-            logger.info("5秒后继续尝试获取消息")
-            continue
-
-            # 以下代码已注释，不再自动重新登录
-            # update_bot_status("waiting_login", "等待微信登录")
-            # 清除所有定时任务
-            # scheduler.remove_all_jobs()
-            # logger.success("所有定时任务已清除")
-            # await bot_core()
-            # break
-
-        # 如果成功获取消息但没有数据，处理消息数据
-
-        # 检查data是否为字典类型
-        if isinstance(data, dict):
-            messages = data.get("AddMsgs")
-            if messages:
-                for message in messages:
-                    asyncio.create_task(xybot.process_message(message))
-        elif data:  # 如果data不是字典但有值，记录日志
-            logger.warning(f"Unexpected data type: {type(data)}, value: {data}")
-
-            # 检测特定的错误消息
-            if isinstance(data, str) and "用户可能退出" in data:
-                # 如果检测到用户退出消息，增加失败计数
+            except Exception as e:
+                logger.warning("获取新消息失败 {}", e)
+                # 增加失败计数
                 message_failure_count += 1
 
                 # 如果连续失败超过阈值，标记为离线状态
                 if message_failure_count >= max_failure_count and not is_offline:
                     is_offline = True
-                    logger.warning(f"检测到用户退出消息，微信可能已离线")
-
-                    # 发送离线通知
-                    notification_service = get_notification_service()
-                    if notification_service and notification_service.enabled and notification_service.triggers.get("offline", False):
-                        if notification_service.token:
-                            logger.info(f"发送微信离线通知，微信ID: {bot.wxid}")
-                            asyncio.create_task(notification_service.send_offline_notification(bot.wxid))
-                        else:
-                            logger.warning("PushPlus Token未设置，无法发送离线通知")
-
-                    # 更新状态为离线
-                    update_bot_status("offline", "微信已离线")
-        # 使用异步睡眠替代忙等待循环
-        await asyncio.sleep(0.5)
+                    logger.warning(f"连续 {message_failure_count} 次获取消息失败，微信可能已离线")
+
+                # 等待一段时间后重试
+                await asyncio.sleep(5)
+                logger.info("5秒后继续尝试获取消息")
+                continue
+
+                # 以下代码已注释，不再自动重新登录
+                # update_bot_status("waiting_login", "等待微信登录")
+                # 清除所有定时任务
+                # scheduler.remove_all_jobs()
+                # logger.success("所有定时任务已清除")
+                # await bot_core()
+                # break
+
+            # 如果成功获取消息但没有数据，处理消息数据
+
+            # 检查data是否为字典类型
+            if isinstance(data, dict):
+                messages = data.get("AddMsgs")
+                if messages:
+                    for message in messages:
+                        asyncio.create_task(xybot.process_message(message))
+            elif data:  # 如果data不是字典但有值，记录日志
+                logger.warning(f"Unexpected data type: {type(data)}, value: {data}")
+
+                # 检测特定的错误消息
+                if isinstance(data, str) and "用户可能退出" in data:
+                    # 如果检测到用户退出消息，增加失败计数
+                    message_failure_count += 1
+
+                    # 如果连续失败超过阈值，标记为离线状态
+                    if message_failure_count >= max_failure_count and not is_offline:
+                        is_offline = True
+                        logger.warning(f"检测到用户退出消息，微信可能已离线")
+
+                        # 发送离线通知
+                        notification_service = get_notification_service()
+                        if notification_service and notification_service.enabled and notification_service.triggers.get("offline", False):
+                            if notification_service.token:
+                                logger.info(f"发送微信离线通知，微信ID: {bot.wxid}")
+                                asyncio.create_task(notification_service.send_offline_notification(bot.wxid))
+                            else:
+                                logger.warning("PushPlus Token未设置，无法发送离线通知")
+
+                        # 更新状态为离线
+                        update_bot_status("offline", "微信已离线")
+            # 使用异步睡眠替代忙等待循环
+            await asyncio.sleep(0.5)
+    finally:
+        # 退出时（取消任务、SystemExit等）写完未落库的消息记录并关闭HTTP会话
+        await xybot.aclose()
 
     # 返回机器人实例（此处不会执行到，因为上面的无限循环）
     return xybot
\ No newline at end of file
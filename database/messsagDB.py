@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 from typing import Optional, List
 
 from pydantic import validate_arguments
-from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, delete
+from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, delete, insert
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_scoped_session
 from sqlalchemy.orm import declarative_base, sessionmaker
@@ -87,6 +87,29 @@ class MessageDB(metaclass=Singleton):
                 await session.rollback()
                 return False
 
+    async def save_messages(self, messages: List[dict]) -> bool:
+        """异步批量保存消息到数据库，所有消息在同一个事务中写入
+
+        Args:
+            messages: 消息字典列表，键与 save_message 的参数一致，可额外包含 timestamp
+
+        Returns:
+            bool: 全部保存成功返回True，否则返回False
+        """
+        if not messages:
+            return True
+
+        async with self._async_session_factory() as session:
+            try:
+                # 传入参数列表时以 executemany 方式执行，只提交一次
+                await session.execute(insert(Message), messages)
+                await session.commit()
+                return True
+            except Exception as e:
+                logging.error(f"批量保存消息失败: {str(e)}")
+                await session.rollback()
+                return False
+
     async def get_messages(self,
                            start_time: Optional[datetime] = None,
                            end_time: Optional[datetime] = None,
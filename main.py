@@ -13,10 +13,15 @@ from loguru import logger
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 
+try:
+    import uvloop  # 可选依赖，Linux/macOS 上使用基于 libuv 的事件循环
+except ImportError:
+    uvloop = None
+
 # 修改导入语句，确保导入正确的bot_core模块
 try:
     # 先尝试使用相对导入（当前目录）
-    from .bot_core import bot_core
+    from .bot_core import bot_core, close_xybot
 except ImportError:
     # 如果相对导入失败，尝试使用绝对导入（当前目录）
     import sys
@@ -24,7 +29,7 @@ except ImportError:
     current_dir = os.path.dirname(os.path.abspath(__file__))
     if current_dir not in sys.path:
         sys.path.append(current_dir)
-    from bot_core import bot_core, set_bot_instance, update_bot_status
+    from bot_core import bot_core, close_xybot, set_bot_instance, update_bot_status
 
 # 管理后台启动函数
 def start_admin_server(config):
@@ -360,6 +365,8 @@ async def main():
         plugins_path = script_dir / "plugins"
 
         handler = ConfigChangeHandler(None)
+        # 重启回调在文件监控线程中执行，需要通过事件循环关闭机器人
+        loop = asyncio.get_running_loop()
 
         def restart_program():
             logger.info("正在重启程序...")
@@ -372,6 +379,11 @@ async def main():
                 multiprocessing.resource_tracker._resource_tracker.clear()
             except Exception as e:
                 logger.warning(f"清理资源时出错: {e}")
+            # 写完未落库的消息记录并关闭HTTP会话，execv 不会执行 finally 中的清理
+            try:
+                asyncio.run_coroutine_threadsafe(close_xybot(), loop).result(timeout=10)
+            except Exception as e:
+                logger.warning(f"关闭机器人时出错: {e}")
             # 重启程序
             os.execv(sys.executable, [sys.executable] + sys.argv)
 
@@ -492,7 +504,10 @@ if __name__ == "__main__":
     signal.signal(signal.SIGTERM, signal_handler)
 
     try:
-        asyncio.run(main())
+        # 安装了 uvloop 时使用 uvloop 事件循环，否则使用默认事件循环
+        loop_factory = uvloop.new_event_loop if uvloop is not None else None
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(main())
     except KeyboardInterrupt:
         logger.info("程序被用户中断")
     finally:
@@ -13,7 +13,8 @@ import pika
 import os
 import asyncio
 import requests
-from threading import Thread
+import queue
+from threading import Thread, Event
 import argparse
 import base64
 
@@ -93,6 +94,10 @@ class WXAdapter:
         self.cache_last_updated = {}  # 缓存最后更新时间
         self.cache_expiry_time = 3600  # 缓存过期时间（秒），1小时
 
+        # 图片发送相关设置
+        self._http = requests.Session()  # 复用HTTP连接，用于下载图片
+        self.max_image_bytes = int(main_config.get("MessageQueue", {}).get("max_image_bytes", 10 * 1024 * 1024))  # 图片大小上限，默认10MB
+
         # 从数据库直接获取当前登录的微信号
         self.my_wxid = 'wxid_nmoq1pfooveu12'
         if not self.my_wxid:
@@ -1072,18 +1077,35 @@ class WXAdapter:
                     logger.error("无法获取我的微信ID，无法发送消息")
                     return {"success": False, "error": "无法获取我的微信ID"}
 
+            # 先通过HEAD请求检查图片大小，过大的图片直接以文本方式发送，避免无谓的下载和编码
+            try:
+                head_response = self._http.head(image_url, timeout=5, allow_redirects=True)
+                content_length = int(head_response.headers.get("Content-Length", 0) or 0)
+            except Exception as e:
+                logger.warning(f"获取图片大小失败，将在下载时检查: {e}")
+                content_length = 0
+
+            if content_length > self.max_image_bytes:
+                logger.warning(f"图片过大: {content_length} 字节，超过限制 {self.max_image_bytes} 字节")
+                return self.send_message(to_wxid, f"[图片过大] {image_url}")
+
             # 先下载图片
             logger.info(f"开始下载图片: {image_url}")
             try:
-                response = requests.get(image_url, timeout=30)
+                response = self._http.get(image_url, timeout=30, stream=True)
                 if response.status_code != 200:
                     logger.error(f"下载图片失败，状态码: {response.status_code}")
+                    # 流式响应需要显式关闭，否则连接要等到被回收时才归还连接池
+                    response.close()
                     return self.send_message(to_wxid, f"[图片下载失败] {image_url}")
 
-                # 将图片内容转换为Base64编码
-                image_data = response.content
-                base64_data = base64.b64encode(image_data).decode('utf-8')
-                logger.info(f"图片下载成功，大小: {len(image_data)} 字节, Base64长度: {len(base64_data)}")
+                # 边下载边编码，未返回Content-Length的图片在超过大小限制时立即中止
+                image_size, base64_data = self._download_image_base64(response)
+                if base64_data is None:
+                    logger.warning(f"图片过大: 已下载 {image_size} 字节，超过限制 {self.max_image_bytes} 字节")
+                    return self.send_message(to_wxid, f"[图片过大] {image_url}")
+
+                logger.info(f"图片下载成功，大小: {image_size} 字节, Base64长度: {len(base64_data)}")
 
             except Exception as e:
                 logger.error(f"下载图片时出错: {e}")
@@ -1160,6 +1182,67 @@ class WXAdapter:
             logger.error(f"发送图片消息时发生异常: {e}")
             return {"success": False, "error": str(e)}
 
+    def _download_image_base64(self, response):
+        """
+        流式下载图片并同时进行Base64编码
+
+        下载线程负责读取网络数据，当前线程负责编码，两者通过有界队列衔接，
+        总耗时约为下载与编码中较慢的一方，而不是两者之和。
+
+        Args:
+            response: 以stream=True方式发起的图片下载响应
+
+        Returns:
+            (图片大小, Base64编码字符串)，图片超过大小限制时编码字符串为None
+        """
+        chunk_queue = queue.Queue(maxsize=4)
+        stop_event = Event()
+
+        def produce():
+            try:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if stop_event.is_set():
+                        return
+                    chunk_queue.put(chunk)
+                chunk_queue.put(None)  # 下载完成
+            except Exception as e:
+                chunk_queue.put(e)
+
+        producer = Thread(target=produce, daemon=True)
+        producer.start()
+
+        encoded = bytearray()
+        pending = b""  # 不足3字节的部分留到下一段一起编码，保证拼接结果与整体编码一致
+        image_size = 0
+        try:
+            while True:
+                chunk = chunk_queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+
+                image_size += len(chunk)
+                if image_size > self.max_image_bytes:
+                    return image_size, None
+
+                data = pending + chunk
+                cut = len(data) - len(data) % 3
+                encoded += base64.b64encode(data[:cut])
+                pending = data[cut:]
+
+            encoded += base64.b64encode(pending)
+            return image_size, encoded.decode('ascii')
+        finally:
+            # 提前退出时通知下载线程停止，并清空队列避免其阻塞在put上
+            stop_event.set()
+            response.close()
+            while producer.is_alive():
+                try:
+                    chunk_queue.get_nowait()
+                except queue.Empty:
+                    producer.join(0.1)
+
     def send_at_all(self, to_wxid: str, content: str):
         """
         发送@全体成员消息，直接调用API的/VXAPI/Msg/SendTxt端点
@@ -1293,28 +1376,29 @@ class MessageConsumer(Thread):
         self.max_retry_interval = 60  # 最大重试间隔（秒）
         self.retry_interval = 5  # 初始重试间隔（秒）
         self.retry_count = 0  # 重试计数
+        # 连接凭证和参数只需构建一次，重连时直接复用
+        self._credentials = pika.PlainCredentials(self.username, self.password)
+        self._parameters = pika.ConnectionParameters(
+            host=self.host,
+            port=self.port,
+            credentials=self._credentials,
+            heartbeat=600,
+            blocked_connection_timeout=300
+        )
+        self._queue_declared = False  # 队列是否已声明过，重连时只需被动确认
         logger.info(f"初始化 MessageConsumer: host={self.host}, port={self.port}, queue={self.queue}")
 
     def connect(self):
         """连接到RabbitMQ服务器"""
         try:
             logger.info(f"正在连接 RabbitMQ: {self.host}:{self.port}, 队列: {self.queue}")
-            # 创建连接凭证
-            credentials = pika.PlainCredentials(self.username, self.password)
-            # 创建连接参数
-            parameters = pika.ConnectionParameters(
-                host=self.host,
-                port=self.port,
-                credentials=credentials,
-                heartbeat=600,
-                blocked_connection_timeout=300
-            )
             # 建立连接
-            self.connection = pika.BlockingConnection(parameters)
+            self.connection = pika.BlockingConnection(self._parameters)
             # 创建频道
             self.channel = self.connection.channel()
-            # 声明队列
-            self.channel.queue_declare(queue=self.queue, durable=True)
+            # 声明队列，重连时队列已存在，使用passive仅确认而不重复声明
+            self.channel.queue_declare(queue=self.queue, durable=True, passive=self._queue_declared)
+            self._queue_declared = True
             logger.info(f"成功连接到 RabbitMQ 服务器 {self.host}:{self.port}, 队列: {self.queue}")
             # 连接成功，重置重试参数
             self.retry_interval = 5
@@ -1322,6 +1406,8 @@ class MessageConsumer(Thread):
             return True
         except Exception as e:
             logger.error(f"连接 RabbitMQ 失败: {e}, host={self.host}, port={self.port}, queue={self.queue}")
+            # 队列可能已被删除，下次连接时重新完整声明
+            self._queue_declared = False
             return False
 
     def run(self):
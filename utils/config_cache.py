@@ -0,0 +1,37 @@
+"""
+主配置缓存模块
+按文件修改时间缓存解析后的 main_config.toml，避免在消息处理路径上重复读取和解析
+"""
+
+import functools
+import os
+import tomllib
+
+MAIN_CONFIG_PATH = "main_config.toml"
+
+
+def load_main_config(config_path: str = MAIN_CONFIG_PATH) -> dict:
+    """读取主配置文件，文件未修改时直接返回缓存的解析结果
+
+    返回的字典在多次调用间共享，调用方不应修改它。
+
+    Args:
+        config_path: 配置文件路径
+
+    Returns:
+        dict: 解析后的配置
+
+    Raises:
+        FileNotFoundError: 配置文件不存在
+        tomllib.TOMLDecodeError: 配置文件格式错误
+    """
+    # 以修改时间作为缓存键的一部分，配置文件被编辑后自动重新解析
+    mtime_ns = os.stat(config_path).st_mtime_ns
+    return _parse_main_config(config_path, mtime_ns)
+
+
+@functools.lru_cache(maxsize=1)
+def _parse_main_config(config_path: str, mtime_ns: int) -> dict:
+    with open(config_path, "rb") as f:
+        data = f.read()
+    return tomllib.loads(data.decode("utf-8"))
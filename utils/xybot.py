@@ -1,17 +1,322 @@
-import tomllib
 import xml.etree.ElementTree as ET
-from typing import Dict, Any
+from xml.sax.saxutils import unescape as xml_unescape
+from typing import Dict, Any, Awaitable, List, Optional, Tuple
 import asyncio
-import io
-
+import functools
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import aiohttp
 from loguru import logger
 
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # 未安装lxml时使用标准库解析
+    lxml_etree = None
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时使用标准库json
+    orjson = None
+
+try:
+    from pybase64 import b64encode as _b64encode
+except ImportError:  # 未安装pybase64时使用标准库base64
+    from base64 import b64encode as _b64encode
+
 from WechatAPI import WechatAPIClient
 from WechatAPI.Client.protect import protector
 from database.messsagDB import MessageDB
 from database.contacts_db import update_contact_in_db, get_contact_from_db
+from utils.config_cache import load_main_config
 from utils.event_manager import EventManager
 
+if lxml_etree is not None:
+    # 解析器可重复使用，不解析实体、不访问网络
+    _LXML_PARSER = lxml_etree.XMLParser(resolve_entities=False, no_network=True)
+    _XML_PARSE_ERRORS = (ET.ParseError, lxml_etree.XMLSyntaxError)
+else:
+    _XML_PARSE_ERRORS = (ET.ParseError,)
+
+if orjson is not None:
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    _json_loads = orjson.loads
+else:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+# 群聊wxid后缀，以及群消息内容中发送人wxid与正文之间的分隔符
+_CHATROOM_SUFFIX = "@chatroom"
+_SENDER_SEP_NEWLINE = ":\n"  # 文本、表情消息
+_SENDER_SEP = ":"  # 图片、语音、视频、xml、系统消息
+
+# MsgSource中atuserlist的wxid，逗号分隔，忽略空项
+_AT_WXID_RE = re.compile(r"[^,]+")
+
+# 图片消息XML中的img节点及其属性
+_IMG_TAG_RE = re.compile(r"<img\s([^>]*)>")
+_XML_ATTR_RE = re.compile(r'([\w:.-]+)\s*=\s*"([^"]*)"')
+_XML_ATTR_ENTITIES = {"&quot;": '"', "&apos;": "'"}
+
+# 引用的xml消息中提取的appmsg字段：节点名 -> (消息字段名, 类型转换, 默认值)
+# 类型转换为None时直接使用节点文本
+_QUOTE_APPMSG_FIELDS = {
+    "title": ("Content", None, ""),
+    "des": ("destination", None, ""),
+    "action": ("action", None, ""),
+    "type": ("XmlType", int, 0),
+    "showtype": ("showtype", int, 0),
+    "soundtype": ("soundtype", int, 0),
+    "url": ("url", None, ""),
+    "lowurl": ("lowurl", None, ""),
+    "dataurl": ("dataurl", None, ""),
+    "lowdataurl": ("lowdataurl", None, ""),
+    "songlyric": ("songlyric", None, ""),
+    "extinfo": ("extinfo", None, ""),
+    "sourceusername": ("sourceusername", None, ""),
+    "sourcedisplayname": ("sourcedisplayname", None, ""),
+    "thumburl": ("thumburl", None, ""),
+    "md5": ("md5", None, ""),
+    "statextstr": ("statextstr", None, ""),
+    "directshare": ("directshare", int, 0),
+}
+# appmsg下appattach节点中提取的字段
+_QUOTE_APPATTACH_FIELDS = {
+    "totallen": ("totallen", int, 0),
+    "attachid": ("attachid", None, ""),
+    "emoticonmd5": ("emoticonmd5", None, ""),
+    "fileext": ("fileext", None, ""),
+    "cdnthumbaeskey": ("cdnthumbaeskey", None, ""),
+    "aeskey": ("aeskey", None, ""),
+}
+
+# 微信团队和系统通知账号，这些账号的消息不交给插件处理
+_SYSTEM_ACCOUNTS = frozenset({
+    'weixin',  # 微信团队
+    'filehelper',  # 文件传输助手
+    'fmessage',  # 朋友推荐通知
+    'medianote',  # 语音记事本
+    'floatbottle',  # 漂流瓶
+    'qmessage',  # QQ离线消息
+    'qqmail',  # QQ邮箱提醒
+    'tmessage',  # 腾讯新闻
+    'weibo',  # 微博推送
+    'newsapp',  # 新闻推送
+    'notification_messages',  # 服务通知
+    'helper_entry',  # 新版微信运动
+    'mphelper',  # 公众号助手
+    'brandsessionholder',  # 公众号消息
+    'weixinreminder',  # 微信提醒
+    'officialaccounts',  # 公众平台
+})
+
+# 特殊账号的wxid特征词（不区分大小写）及日志中显示的账号类型
+_ACCOUNT_FEATURE_LABELS = {
+    "wxpay": "微信支付相关",  # 微信支付相关通知
+    "tencent": "腾讯游戏相关",  # 腾讯游戏相关通知
+    "game": "腾讯游戏相关",
+    "service": "官方服务账号",  # 微信官方账号通常包含"service"或"official"
+    "official": "官方服务账号",
+}
+_ACCOUNT_FEATURE_RE = re.compile("|".join(_ACCOUNT_FEATURE_LABELS), re.IGNORECASE | re.ASCII)
+
+# 消息过滤结果缓存的最大条目数
+_IGNORE_CACHE_MAX = 4096
+
+# 联系人信息批量更新设置
+_CONTACT_FLUSH_INTERVAL = 1.0  # 合并更新的时间窗口（秒）
+_CONTACT_REFRESH_TTL = 3600  # 已更新的联系人在此时间内不再重复更新（秒）
+_CONTACT_REFRESH_MAX = 10000  # 最多记录的已更新联系人数量
+_CONTACT_DB_CACHE_TTL = 600  # 联系人数据库记录的缓存时间（秒）
+_CONTACT_DB_CACHE_MAX = 5000  # 最多缓存的联系人数据库记录数量
+
+# 消息写入队列配置：消息记录在后台批量写入数据库，不阻塞消息处理
+_MSG_WRITE_QUEUE_MAX = 10000  # 队列上限，超出时丢弃并记录警告
+_MSG_WRITE_BATCH = 100  # 单次批量写入的最大消息数
+_MSG_WRITE_LINGER = 0.05  # 未满一批时等待后续消息的时间（秒）
+# 队列中消息记录元组各位置对应的数据库字段
+_MSG_COLUMNS = ("msg_id", "sender_wxid", "from_wxid", "msg_type", "content", "is_group", "timestamp")
+
+
+def _parse_xml(text: str):
+    """解析XML字符串，安装了lxml时使用lxml，否则使用标准库
+
+    Args:
+        text: XML字符串
+
+    Returns:
+        XML根节点
+    """
+    if lxml_etree is not None:
+        return lxml_etree.fromstring(text.encode("utf-8"), _LXML_PARSER)
+    return ET.fromstring(text)
+
+
+def _looks_like_xml(text) -> bool:
+    """粗略判断内容是否为XML，用于在解析前排除明显不是XML的内容
+
+    Args:
+        text: 消息内容
+
+    Returns:
+        bool: 内容以"<"开头（忽略前导空白）时返回True
+    """
+    return isinstance(text, str) and text.lstrip().startswith("<")
+
+
+def _parse_img_attrs(content: str) -> Optional[Dict[str, str]]:
+    """直接从图片消息XML中提取img节点的属性，无需构建整棵XML树
+
+    Args:
+        content: 图片消息XML
+
+    Returns:
+        dict: img节点的属性，未找到img节点或未能提取aeskey、length时返回None，由调用方完整解析XML
+    """
+    match = _IMG_TAG_RE.search(content)
+    if match is None:
+        return None
+    attrs = {key: xml_unescape(value, _XML_ATTR_ENTITIES) for key, value in _XML_ATTR_RE.findall(match.group(1))}
+    # 单引号属性值、属性值中含有">"等情况正则无法正确提取
+    if "aeskey" not in attrs or "length" not in attrs:
+        return None
+    return attrs
+
+
+# 分段下载时按消息XML中的length预分配缓冲区并逐段创建任务
+# length 超过此上限视为异常值，直接改用download_image，避免一次分配巨大内存和大量任务
+_MAX_IMAGE_BYTES = 32 * 1024 * 1024
+
+# 常见图片格式的文件头，用于校验下载的图片数据
+_IMAGE_MAGIC = (
+    b"\xff\xd8\xff",  # JPEG
+    b"\x89PNG\r\n\x1a\n",  # PNG
+    b"GIF87a",  # GIF
+    b"GIF89a",
+    b"BM",  # BMP
+)
+
+
+def _is_image(data) -> bool:
+    """根据文件头判断数据是否为图片，只检查前12个字节
+
+    Args:
+        data: 图片数据，bytes或bytearray
+
+    Returns:
+        bool: 是常见格式的图片返回True
+    """
+    header = bytes(data[:12])
+    if header.startswith(_IMAGE_MAGIC):
+        return True
+    # WEBP: RIFF....WEBP
+    return header[:4] == b"RIFF" and header[8:12] == b"WEBP"
+
+
+def _parse_ats(msg_source: str) -> list:
+    """从消息的MsgSource中解析被@的wxid列表
+
+    Args:
+        msg_source: 消息的MsgSource XML
+
+    Returns:
+        list: 被@的wxid列表，没有@信息时返回空列表
+    """
+    if not msg_source:
+        return []
+    atuserlist = _parse_xml(msg_source).find("atuserlist")
+    if atuserlist is None or not atuserlist.text:
+        return []
+    return _AT_WXID_RE.findall(atuserlist.text)
+
+
+def _extract_fields(element, fields: dict) -> dict:
+    """按字段表从XML节点中提取子节点的文本，只遍历一次子节点
+
+    Args:
+        element: XML节点，为None时所有字段取默认值
+        fields: 节点名到 (字段名, 类型转换, 默认值) 的字段表
+
+    Returns:
+        dict: 字段名到字段值的映射，同名子节点取第一个
+    """
+    result = {key: default for key, _, default in fields.values()}
+    if element is None:
+        return result
+
+    seen = set()
+    for child in element:
+        spec = fields.get(child.tag)
+        if spec is None or child.tag in seen:
+            continue
+        seen.add(child.tag)
+        key, convert, _ = spec
+        result[key] = child.text if convert is None else convert(child.text)
+    return result
+
+
+def _intern_wxid(wxid):
+    """驻留wxid字符串，同一wxid在集合查找和缓存键比较时可以直接按对象身份命中
+
+    Args:
+        wxid: wxid，非字符串原样返回
+
+    Returns:
+        驻留后的wxid
+    """
+    return sys.intern(wxid) if type(wxid) is str else wxid
+
+
+def _to_int(value) -> int:
+    """将消息字段转换为整数，接口返回的字段通常已经是整数，此时直接返回
+
+    Args:
+        value: 字段值
+
+    Returns:
+        int: 整数值，空值返回0
+    """
+    if type(value) is int:
+        return value
+    return int(value or 0)
+
+
+def _normalize_contact_detail(wxid: str, item: dict) -> dict:
+    """将接口返回的联系人详情统一整理为数据库使用的联系人信息
+
+    Args:
+        wxid: 联系人的wxid
+        item: 接口返回的单个联系人详情
+
+    Returns:
+        dict: 包含wxid、nickname、avatar、remark、alias的联系人信息
+    """
+
+    def pick(*keys):
+        # 按顺序取第一个非空字段，字典形式的字段取其中的string值
+        for key in keys:
+            value = item.get(key)
+            if isinstance(value, dict):
+                value = value.get('string')
+            if value:
+                return value
+        return ''
+
+    return {
+        'wxid': wxid,
+        'nickname': pick('nickname', 'NickName') or wxid,
+        # 头像优先使用BigHeadImgUrl或SmallHeadImgUrl
+        'avatar': pick('BigHeadImgUrl', 'SmallHeadImgUrl', 'avatar'),
+        'remark': pick('remark', 'Remark'),
+        'alias': pick('alias', 'Alias')
+    }
+
 
 class XYBot:
     def __init__(self, bot_client: WechatAPIClient):
@@ -22,7 +327,6 @@ class XYBot:
         self.phone = None
 
         # 打印当前工作目录，便于调试
-        import os
         logger.debug(f"当前工作目录: {os.getcwd()}")
 
         # 检查配置文件是否存在
@@ -33,16 +337,28 @@ class XYBot:
         else:
             logger.debug(f"配置文件 {config_path} 存在，大小: {os.path.getsize(config_path)} 字节")
             try:
-                with open(config_path, "rb") as f:
-                    main_config = tomllib.load(f)
-                    # 打印配置文件的所有键
-                    logger.debug(f"配置文件的所有键: {list(main_config.keys())}")
+                main_config = load_main_config(config_path)
+                # 打印配置文件的所有键
+                logger.debug(f"配置文件的所有键: {list(main_config.keys())}")
             except Exception as e:
                 logger.error(f"加载配置文件失败: {e}")
                 main_config = {}
 
         self.ignore_protection = main_config.get("XYBot", {}).get("ignore-protection", False)
 
+        # 根据协议版本确定API路径前缀，849使用/VXAPI，855或ipad使用/api
+        protocol_version = main_config.get("Protocol", {}).get("version", "849")
+        self._api_prefix = "/VXAPI" if protocol_version == "849" else "/api"
+        logger.info(f"使用{protocol_version}协议前缀: {self._api_prefix}")
+
+        # 群成员接口地址只取决于客户端地址和协议前缀，初始化时构建一次
+        api_base = "http://127.0.0.1:9011"
+        if hasattr(self.bot, 'ip') and hasattr(self.bot, 'port'):
+            api_base = f"http://{self.bot.ip}:{self.bot.port}"
+        # 客户端显式设置的前缀优先于协议版本对应的前缀
+        api_prefix = getattr(self.bot, 'api_prefix', "") or getattr(self.bot, '_api_prefix', "") or self._api_prefix
+        self._group_member_url = f"{api_base}{api_prefix}/Group/GetChatRoomMemberDetail"
+
         # 从配置文件中读取消息过滤设置
         try:
             # 尝试从顶层读取设置
@@ -64,6 +380,22 @@ class XYBot:
             self.whitelist = []
             self.blacklist = []
 
+        # 预先构建集合，使 ignore_check 中的成员判断为 O(1)，列表属性保留以兼容外部使用
+        self._whitelist_set = frozenset(map(_intern_wxid, self.whitelist))
+        self._blacklist_set = frozenset(map(_intern_wxid, self.blacklist))
+
+        # 过滤模式启动后不再变化，初始化时选定对应的判断方法，避免每条消息都比较模式
+        if self.ignore_mode == "Whitelist":
+            self._check_allowed = self._check_whitelist
+        elif self.ignore_mode == "Blacklist":
+            self._check_allowed = self._check_blacklist
+        else:
+            self._check_allowed = self._check_all
+
+        # 过滤结果只取决于wxid和上面的过滤配置，按wxid缓存判断结果
+        # 过滤配置只在初始化时读取，修改后需调用 self._cached_ignore_decision.cache_clear()
+        self._cached_ignore_decision = functools.lru_cache(maxsize=_IGNORE_CACHE_MAX)(self._ignore_decision)
+
         # 记录配置信息
         logger.info(f"消息过滤模式: {self.ignore_mode}")
         logger.info(f"白名单: {self.whitelist}")
@@ -71,6 +403,35 @@ class XYBot:
 
         self.msg_db = MessageDB()
 
+        # 消息类型与处理方法的对应关系
+        self._handlers = {
+            1: self.process_text_message,  # 文本消息
+            3: self.process_image_message,  # 图片消息
+            34: self.process_voice_message,  # 语音消息
+            43: self.process_video_message,  # 视频消息
+            47: self.process_emoji_message,  # 表情消息
+            49: self.process_xml_message,  # xml消息
+            10002: self.process_system_message,  # 系统消息
+        }
+
+        # 待更新的联系人，按时间窗口合并后批量更新
+        self._contact_queue: set = set()
+        self._contact_flush_task: Optional[asyncio.Task] = None
+        self._contact_refreshed: Dict[str, float] = {}  # 最近已更新的联系人及更新时间
+        self._contact_db_cache: Dict[str, tuple] = {}  # wxid -> (读取时间, 数据库中的联系人信息)
+
+        # 待写入数据库的消息记录，由后台任务批量写入
+        self._msg_write_queue: asyncio.Queue = asyncio.Queue(maxsize=_MSG_WRITE_QUEUE_MAX)
+        self._msg_writer_task: Optional[asyncio.Task] = None
+        self._msg_write_inflight: Optional[list] = None  # 写入任务正在写入的一批记录
+
+        # 风控保护期已结束时对应的登录时间，登录时间不变时无需再次计算
+        self._protection_over_login_time: Optional[int] = None
+
+        # 共享的HTTP会话，复用连接池，首次使用时创建
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+
     def update_profile(self, wxid: str, nickname: str, alias: str, phone: str):
         """更新机器人信息"""
         self.wxid = wxid
@@ -86,6 +447,49 @@ class XYBot:
         """
         return self.wxid is not None
 
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的HTTP会话，首次使用或已关闭时重新创建
+
+        Returns:
+            aiohttp.ClientSession: 复用连接池的HTTP会话
+        """
+        if self._http_session is None or self._http_session.closed:
+            async with self._session_lock:
+                if self._http_session is None or self._http_session.closed:
+                    self._http_session = aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=60),
+                        json_serialize=_json_dumps
+                    )
+        return self._http_session
+
+    async def aclose(self):
+        """关闭共享的HTTP会话并等待未写入的消息记录落库，在机器人退出时调用
+
+        退出时事件循环可能已经取消了后台写入任务，此时直接写入队列中剩余的记录。
+        """
+        try:
+            # 联系人信息下次启动时会重新更新，退出时直接取消
+            if self._contact_flush_task is not None and not self._contact_flush_task.done():
+                self._contact_flush_task.cancel()
+                await asyncio.gather(self._contact_flush_task, return_exceptions=True)
+
+            # 写入任务被取消时 gather 返回 CancelledError 而不是抛出
+            if self._msg_writer_task is not None:
+                await asyncio.gather(self._msg_writer_task, return_exceptions=True)
+
+            # 写入任务中途被取消时，补写正在写入的批次和队列中剩余的记录
+            pending = self._msg_write_inflight or []
+            self._msg_write_inflight = None
+            queue = self._msg_write_queue
+            while not queue.empty():
+                pending.append(queue.get_nowait())
+            for start in range(0, len(pending), _MSG_WRITE_BATCH):
+                await self._write_message_batch(pending[start:start + _MSG_WRITE_BATCH])
+        finally:
+            if self._http_session is not None and not self._http_session.closed:
+                await self._http_session.close()
+            self._http_session = None
+
     async def get_chatroom_member_list(self, group_wxid: str):
         """获取群成员列表
 
@@ -95,7 +499,7 @@ class XYBot:
         Returns:
             list: 群成员列表
         """
-        if not group_wxid.endswith("@chatroom"):
+        if not group_wxid.endswith(_CHATROOM_SUFFIX):
             logger.error(f"无效的群ID: {group_wxid}，只有群聊才能获取成员列表")
             return []
 
@@ -104,63 +508,20 @@ class XYBot:
 
             # 直接调用微信API获取群成员列表
             try:
-                import aiohttp
-                import json
-
-                # 获取微信API的基本配置
-                api_base = "http://127.0.0.1:9011"
-                if hasattr(self.bot, 'ip') and hasattr(self.bot, 'port'):
-                    api_base = f"http://{self.bot.ip}:{self.bot.port}"
-
-                # 确定API路径前缀
-                api_prefix = ""
-
-                # 先检查是否有显式设置的前缀
-                if hasattr(self.bot, 'api_prefix'):
-                    api_prefix = self.bot.api_prefix
-                elif hasattr(self.bot, '_api_prefix'):
-                    api_prefix = self.bot._api_prefix
-
-                # 如果没有显式设置，则根据协议版本确定
-                if api_prefix == "":
-                    # 读取协议版本配置
-                    try:
-                        import tomllib
-                        with open("main_config.toml", "rb") as f:
-                            config = tomllib.load(f)
-                            protocol_version = config.get("Protocol", {}).get("version", "849")
-
-                            # 根据协议版本选择前缀
-                            if protocol_version == "849":
-                                api_prefix = "/VXAPI"
-                                logger.info(f"使用849协议前缀: {api_prefix}")
-                            else:  # 855 或 ipad
-                                api_prefix = "/api"
-                                logger.info(f"使用{protocol_version}协议前缀: {api_prefix}")
-                    except Exception as e:
-                        logger.warning(f"读取协议版本失败，使用默认前缀: {e}")
-                        # 默认使用 849 的前缀
-                        api_prefix = "/VXAPI"
-                        logger.info(f"使用默认协议前缀: {api_prefix}")
-
                 # 获取当前登录的wxid
                 wxid = ""
                 if hasattr(self.bot, 'wxid'):
                     wxid = self.bot.wxid
 
-                logger.info(f"使用API路径: {api_base}{api_prefix}/Group/GetChatRoomMemberDetail")
+                logger.info(f"使用API路径: {self._group_member_url}")
 
                 # 直接调用API获取群成员
-                async with aiohttp.ClientSession() as session:
-                    json_param = {"QID": group_wxid, "Wxid": wxid}
-                    logger.info(f"发送请求参数: {json.dumps(json_param)}")
-
-                    response = await session.post(
-                        f'{api_base}{api_prefix}/Group/GetChatRoomMemberDetail',
-                        json=json_param,
-                        headers={"Content-Type": "application/json"}
-                    )
+                session = await self._get_session()
+                json_param = {"QID": group_wxid, "Wxid": wxid}
+                logger.opt(lazy=True).info("发送请求参数: {}", lambda: _json_dumps(json_param))
 
+                # json参数会自动设置Content-Type，无需额外传入headers
+                async with session.post(self._group_member_url, json=json_param) as response:
                     # 检查响应状态
                     if response.status != 200:
                         logger.error(f"获取群成员列表失败: HTTP状态码 {response.status}")
@@ -168,8 +529,8 @@ class XYBot:
 
                     # 解析响应数据
                     try:
-                        json_resp = await response.json()
-                        logger.info(f"收到API响应: {json.dumps(json_resp)[:200]}...")
+                        json_resp = _json_loads(await response.read())
+                        logger.opt(lazy=True).info("收到API响应: {}...", lambda: _json_dumps(json_resp)[:200])
 
                         if json_resp.get("Success"):
                             # 处理成功响应
@@ -226,213 +587,273 @@ class XYBot:
             logger.error(f"获取群成员列表时发生异常: {str(e)}")
             return []
 
+    def _get_contact_cached(self, wxid: str):
+        """从数据库读取联系人信息，缓存时间内重复读取同一联系人时直接返回缓存
+
+        Args:
+            wxid: 联系人的wxid
+
+        Returns:
+            dict: 联系人信息，不存在时返回None
+        """
+        now = time.monotonic()
+        cached = self._contact_db_cache.get(wxid)
+        if cached is not None and now - cached[0] < _CONTACT_DB_CACHE_TTL:
+            return cached[1]
+
+        contact = get_contact_from_db(wxid)
+        if contact:
+            if len(self._contact_db_cache) >= _CONTACT_DB_CACHE_MAX:
+                self._contact_db_cache.clear()
+            self._contact_db_cache[wxid] = (now, contact)
+        return contact
+
     async def update_contact_info(self, wxid: str):
         """更新联系人信息
 
         Args:
             wxid: 联系人的wxid
         """
+        # 群聊不获取详细信息，只需保证数据库中有基本信息
+        if wxid.endswith(_CHATROOM_SUFFIX):
+            try:
+                existing_contact = self._get_contact_cached(wxid)
+                if not existing_contact or not existing_contact.get('nickname'):
+                    contact_info = {
+                        'wxid': wxid,
+                        'nickname': wxid,
+                        'type': 'group'
+                    }
+                    update_contact_in_db(contact_info)
+                    # 直接缓存写入的记录，之后同一群聊的消息无需再读取数据库
+                    if len(self._contact_db_cache) >= _CONTACT_DB_CACHE_MAX:
+                        self._contact_db_cache.clear()
+                    self._contact_db_cache[wxid] = (time.monotonic(), contact_info)
+                    logger.debug("已在消息处理中更新群聊 {} 的基本信息", wxid)
+            except Exception as e:
+                logger.error(f"更新群聊 {wxid} 信息时发生异常: {str(e)}")
+            return
+
         try:
             # 先检查数据库中是否已有该联系人的信息
-            existing_contact = get_contact_from_db(wxid)
+            existing_contact = self._get_contact_cached(wxid)
 
             # 如果数据库中没有该联系人的信息，或者信息不完整，则从 API 获取
             if not existing_contact or not existing_contact.get('nickname'):
                 # 从 API 获取联系人信息
                 try:
-                    # 如果是群聊，不获取详细信息
-                    if wxid.endswith("@chatroom"):
-                        contact_info = {
-                            'wxid': wxid,
-                            'nickname': wxid,
-                            'type': 'group'
-                        }
-                        # 更新到数据库
-                        update_contact_in_db(contact_info)
-                        logger.debug(f"已在消息处理中更新群聊 {wxid} 的基本信息")
-                    else:
-                        # 获取联系人详细信息
-                        logger.debug(f"开始获取联系人 {wxid} 的详细信息")
-                        try:
-                            detail = await self.bot.get_contract_detail(wxid)
-                            logger.debug(f"获取到联系人 {wxid} 的详细信息: {detail}")
-
-                            if detail:
-                                # 处理返回结果
-                                if isinstance(detail, list) and len(detail) > 0:
-                                    detail_item = detail[0]
-                                    logger.debug(f"联系人 {wxid} 详情项类型: {type(detail_item)}")
-
-                                    if isinstance(detail_item, dict):
-                                        # 记录详细的字段信息，帮助调试
-                                        logger.debug(f"联系人 {wxid} 详情字段: {list(detail_item.keys())}")
-
-                                        # 检查nickname字段的类型和值
-                                        nickname_value = detail_item.get('nickname')
-                                        if nickname_value is None:
-                                            # 尝试其他可能的字段名
-                                            nickname_value = detail_item.get('NickName')
-                                            if nickname_value is None:
-                                                logger.warning(f"联系人 {wxid} 没有找到nickname或NickName字段")
-                                            else:
-                                                logger.debug(f"联系人 {wxid} 使用NickName字段: {nickname_value}")
-                                        else:
-                                            logger.debug(f"联系人 {wxid} 使用nickname字段: {nickname_value}")
-
-                                        # 如果nickname是字典类型，尝试获取其中的string字段
-                                        if isinstance(nickname_value, dict):
-                                            logger.debug(f"联系人 {wxid} 的nickname是字典类型: {nickname_value}")
-                                            nickname_string = nickname_value.get('string')
-                                            if nickname_string:
-                                                nickname_value = nickname_string
-                                                logger.debug(f"从字典中提取nickname.string: {nickname_string}")
-
-                                        # 处理头像字段 - 优先使用BigHeadImgUrl或SmallHeadImgUrl
-                                        avatar_value = detail_item.get('BigHeadImgUrl', '')
-                                        if not avatar_value:
-                                            avatar_value = detail_item.get('SmallHeadImgUrl', '')
-                                        if not avatar_value:
-                                            # 如果没有直接的URL，尝试使用avatar字段
-                                            avatar_value = detail_item.get('avatar', '')
-                                            if isinstance(avatar_value, dict):
-                                                avatar_value = avatar_value.get('string', '')
-
-                                        logger.debug(f"联系人 {wxid} 的头像地址: {avatar_value}")
-
-                                        # 处理备注字段
-                                        remark_value = detail_item.get('remark', '')
-                                        if remark_value is None or not remark_value:
-                                            remark_value = detail_item.get('Remark', '')
-                                        if isinstance(remark_value, dict):
-                                            remark_value = remark_value.get('string', '')
-
-                                        # 处理微信号字段
-                                        alias_value = detail_item.get('alias', '')
-                                        if alias_value is None or not alias_value:
-                                            alias_value = detail_item.get('Alias', '')
-                                        if isinstance(alias_value, dict):
-                                            alias_value = alias_value.get('string', '')
-
-                                        # 构建联系人信息
-                                        contact_info = {
-                                            'wxid': wxid,
-                                            'nickname': nickname_value if nickname_value else wxid,
-                                            'avatar': avatar_value,
-                                            'remark': remark_value,
-                                            'alias': alias_value
-                                        }
-                                        logger.debug(f"解析联系人 {wxid} 详情成功: {contact_info}")
-                                    else:
-                                        logger.warning(f"联系人 {wxid} 详情格式不是字典: {detail_item}")
-                                        # 创建基本联系人信息
-                                        contact_info = {
-                                            'wxid': wxid,
-                                            'nickname': wxid,
-                                            'type': 'friend'
-                                        }
-                                elif isinstance(detail, dict):
-                                    # 记录详细的字段信息，帮助调试
-                                    logger.debug(f"联系人 {wxid} 详情字段(字典格式): {list(detail.keys())}")
-
-                                    # 检查nickname字段的类型和值
-                                    nickname_value = detail.get('nickname')
-                                    if nickname_value is None:
-                                        # 尝试其他可能的字段名
-                                        nickname_value = detail.get('NickName')
-                                        if nickname_value is None:
-                                            logger.warning(f"联系人 {wxid} 没有找到nickname或NickName字段")
-                                        else:
-                                            logger.debug(f"联系人 {wxid} 使用NickName字段: {nickname_value}")
-                                    else:
-                                        logger.debug(f"联系人 {wxid} 使用nickname字段: {nickname_value}")
-
-                                    # 如果nickname是字典类型，尝试获取其中的string字段
-                                    if isinstance(nickname_value, dict):
-                                        logger.debug(f"联系人 {wxid} 的nickname是字典类型: {nickname_value}")
-                                        nickname_string = nickname_value.get('string')
-                                        if nickname_string:
-                                            nickname_value = nickname_string
-                                            logger.debug(f"从字典中提取nickname.string: {nickname_string}")
-
-                                    # 处理头像字段 - 优先使用BigHeadImgUrl或SmallHeadImgUrl
-                                    avatar_value = detail.get('BigHeadImgUrl', '')
-                                    if not avatar_value:
-                                        avatar_value = detail.get('SmallHeadImgUrl', '')
-                                    if not avatar_value:
-                                        # 如果没有直接的URL，尝试使用avatar字段
-                                        avatar_value = detail.get('avatar', '')
-                                        if isinstance(avatar_value, dict):
-                                            avatar_value = avatar_value.get('string', '')
-
-                                    logger.debug(f"联系人 {wxid} 的头像地址(字典格式): {avatar_value}")
-
-                                    # 处理备注字段
-                                    remark_value = detail.get('remark', '')
-                                    if remark_value is None or not remark_value:
-                                        remark_value = detail.get('Remark', '')
-                                    if isinstance(remark_value, dict):
-                                        remark_value = remark_value.get('string', '')
-
-                                    # 处理微信号字段
-                                    alias_value = detail.get('alias', '')
-                                    if alias_value is None or not alias_value:
-                                        alias_value = detail.get('Alias', '')
-                                    if isinstance(alias_value, dict):
-                                        alias_value = alias_value.get('string', '')
-
-                                    # 构建联系人信息
-                                    contact_info = {
-                                        'wxid': wxid,
-                                        'nickname': nickname_value if nickname_value else wxid,
-                                        'avatar': avatar_value,
-                                        'remark': remark_value,
-                                        'alias': alias_value
-                                    }
-                                    logger.debug(f"解析联系人 {wxid} 详情成功(字典格式): {contact_info}")
-                                else:
-                                    logger.warning(f"联系人 {wxid} 详情格式不支持: {type(detail)}")
-                                    # 创建基本联系人信息
-                                    contact_info = {
-                                        'wxid': wxid,
-                                        'nickname': wxid,
-                                        'type': 'friend'
-                                    }
-                            else:
+                    # 获取联系人详细信息
+                    logger.debug("开始获取联系人 {} 的详细信息", wxid)
+                    try:
+                        detail = await self.bot.get_contract_detail(wxid)
+                        logger.debug("获取到联系人 {} 的详细信息: {}", wxid, detail)
+
+                        # 接口可能返回列表或字典，统一取出单个详情项
+                        detail_item = detail[0] if isinstance(detail, list) and detail else detail
+
+                        if isinstance(detail_item, dict) and detail_item:
+                            contact_info = _normalize_contact_detail(wxid, detail_item)
+                            logger.debug("解析联系人 {} 详情成功: {}", wxid, contact_info)
+                        else:
+                            if not detail_item:
                                 logger.warning(f"无法获取联系人 {wxid} 的详细信息，API返回空数据")
-                                # 创建基本联系人信息
-                                contact_info = {
-                                    'wxid': wxid,
-                                    'nickname': wxid,
-                                    'type': 'friend'
-                                }
-
-                            # 更新到数据库
-                            update_contact_in_db(contact_info)
-                            logger.debug(f"已在消息处理中更新联系人 {wxid} 的信息")
-                        except Exception as e:
-                            logger.error(f"调用API获取联系人 {wxid} 详情失败: {str(e)}")
+                            else:
+                                logger.warning(f"联系人 {wxid} 详情格式不支持: {type(detail_item)}")
                             # 创建基本联系人信息
                             contact_info = {
                                 'wxid': wxid,
                                 'nickname': wxid,
                                 'type': 'friend'
                             }
-                            # 仍然更新到数据库，确保至少有基本信息
-                            update_contact_in_db(contact_info)
-                            logger.debug(f"已在消息处理中更新联系人 {wxid} 的基本信息")
+
+                        # 更新到数据库
+                        update_contact_in_db(contact_info)
+                        logger.debug("已在消息处理中更新联系人 {} 的信息", wxid)
+                    except Exception as e:
+                        logger.error(f"调用API获取联系人 {wxid} 详情失败: {str(e)}")
+                        # 创建基本联系人信息
+                        contact_info = {
+                            'wxid': wxid,
+                            'nickname': wxid,
+                            'type': 'friend'
+                        }
+                        # 仍然更新到数据库，确保至少有基本信息
+                        update_contact_in_db(contact_info)
+                        logger.debug("已在消息处理中更新联系人 {} 的基本信息", wxid)
                 except Exception as e:
                     logger.error(f"在消息处理中获取联系人 {wxid} 信息失败: {str(e)}")
                     # 创建基本联系人信息并保存
                     contact_info = {
                         'wxid': wxid,
                         'nickname': wxid,
-                        'type': 'friend' if not wxid.endswith("@chatroom") else 'group'
+                        'type': 'friend'
                     }
                     update_contact_in_db(contact_info)
-                    logger.debug(f"已在消息处理中更新联系人 {wxid} 的基本信息(异常处理)")
+                    logger.debug("已在消息处理中更新联系人 {} 的基本信息(异常处理)", wxid)
+
+                # 数据库记录已更新，丢弃缓存的旧记录
+                self._contact_db_cache.pop(wxid, None)
         except Exception as e:
             logger.error(f"更新联系人信息时发生异常: {str(e)}")
 
+    def _queue_contact_update(self, wxid: str):
+        """将联系人加入待更新队列，最近已更新过的联系人直接跳过
+
+        Args:
+            wxid: 联系人的wxid
+        """
+        refreshed_at = self._contact_refreshed.get(wxid)
+        if refreshed_at is not None and time.monotonic() - refreshed_at < _CONTACT_REFRESH_TTL:
+            return
+
+        self._contact_queue.add(wxid)
+        if self._contact_flush_task is None or self._contact_flush_task.done():
+            self._contact_flush_task = asyncio.create_task(self._contact_flush_loop())
+
+    async def _contact_flush_loop(self):
+        """后台按时间窗口批量更新联系人信息，队列清空后退出"""
+        while self._contact_queue:
+            await asyncio.sleep(_CONTACT_FLUSH_INTERVAL)
+            batch = list(self._contact_queue)
+            self._contact_queue = set()
+
+            logger.debug("批量更新 {} 个联系人信息", len(batch))
+            results = await asyncio.gather(*(self.update_contact_info(wxid) for wxid in batch),
+                                           return_exceptions=True)
+
+            now = time.monotonic()
+            for wxid, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.error(f"更新联系人 {wxid} 信息失败: {result}")
+                else:
+                    self._contact_refreshed[wxid] = now
+
+            # 清理过期记录，避免无限增长
+            if len(self._contact_refreshed) > _CONTACT_REFRESH_MAX:
+                self._contact_refreshed = {
+                    wxid: refreshed_at for wxid, refreshed_at in self._contact_refreshed.items()
+                    if now - refreshed_at < _CONTACT_REFRESH_TTL
+                }
+                if len(self._contact_refreshed) > _CONTACT_REFRESH_MAX:
+                    self._contact_refreshed.clear()
+
+    def _queue_message_save(self, msg_id: int, sender_wxid: str, from_wxid: str, msg_type: int,
+                            content: str, is_group: bool):
+        """将消息记录放入写入队列，由后台任务批量写入数据库
+
+        Args:
+            msg_id: 消息ID
+            sender_wxid: 发送人wxid
+            from_wxid: 消息来源wxid
+            msg_type: 消息类型
+            content: 消息内容
+            is_group: 是否群消息
+        """
+        try:
+            # 队列中只保存元组，写入时再按 _MSG_COLUMNS 组装成字典
+            self._msg_write_queue.put_nowait(
+                (msg_id, sender_wxid, from_wxid, msg_type, content, is_group, datetime.now())
+            )
+        except asyncio.QueueFull:
+            logger.warning("消息写入队列已满，丢弃消息记录: {}", msg_id)
+            return
+
+        if self._msg_writer_task is None or self._msg_writer_task.done():
+            self._msg_writer_task = asyncio.create_task(self._msg_writer())
+
+    async def _msg_writer(self):
+        """后台批量写入消息记录，队列清空后退出"""
+        queue = self._msg_write_queue
+        while not queue.empty():
+            # 未满一批时稍等片刻，让同一波消息合并到一次事务中写入
+            if queue.qsize() < _MSG_WRITE_BATCH:
+                await asyncio.sleep(_MSG_WRITE_LINGER)
+            batch = [queue.get_nowait()]
+            while len(batch) < _MSG_WRITE_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            # 记录正在写入的批次，写入任务被取消时由 aclose 补写
+            self._msg_write_inflight = batch
+            await self._write_message_batch(batch)
+            self._msg_write_inflight = None
+
+    async def _write_message_batch(self, batch: list):
+        """在一个事务中写入一批消息记录，失败时逐条重试
+
+        Args:
+            batch: 入队时的消息记录元组列表，字段顺序与 _MSG_COLUMNS 一致
+        """
+        rows = [dict(zip(_MSG_COLUMNS, record)) for record in batch]
+        if not await self.msg_db.save_messages(rows):
+            # 批量写入失败时逐条重试，只丢弃本身写入失败的记录
+            logger.warning("批量写入 {} 条消息记录失败，改为逐条写入", len(batch))
+            for row in rows:
+                # 仍通过 save_messages 写入，保留入队时记录的时间戳
+                if not await self.msg_db.save_messages([row]):
+                    logger.error("写入消息记录失败，已丢弃: {}", row["msg_id"])
+
+    def _in_protection(self) -> bool:
+        """检查是否处于新设备登录后4小时的风控保护期
+
+        保护期结束后记录对应的登录时间，重新登录前直接返回False，不再计算时间。
+
+        Returns:
+            bool: 处于保护期且未配置忽略保护时返回True
+        """
+        if self.ignore_protection:
+            return False
+        login_time = protector.login_time
+        if login_time == self._protection_over_login_time:
+            return False
+        if protector.check(14400):
+            return True
+        self._protection_over_login_time = login_time
+        return False
+
+    async def _emit_checked(self, message: Dict[str, Any], *event_names: str, sender_key: str = "SenderWxid"):
+        """通过消息过滤和风控保护检查后，依次触发事件
+
+        Args:
+            message: 消息
+            *event_names: 要触发的事件名
+            sender_key: 消息中发送人wxid所在的字段
+        """
+        if not self.ignore_check(message["FromWxid"], message[sender_key], message["IsGroup"]):
+            return
+        if self._in_protection():
+            logger.warning("风控保护: 新设备登录后4小时内请挂机")
+            return
+        for event_name in event_names:
+            logger.debug("触发 {} 事件: 消息ID: {}", event_name, message.get("MsgId", ""))
+            await EventManager.emit(event_name, self.bot, message)
+
+    async def _emit_private(self, message: Dict[str, Any], event_name: str, label: str,
+                            sender_key: str = "SenderWxid"):
+        """私聊消息通过检查后触发事件，群聊消息只记录日志后忽略
+
+        Args:
+            message: 消息
+            event_name: 要触发的事件名
+            label: 日志中显示的消息类型
+            sender_key: 消息中发送人wxid所在的字段
+        """
+        if message["IsGroup"]:
+            self._log_group_ignored(message, label, sender_key)
+            return
+        await self._emit_checked(message, event_name, sender_key=sender_key)
+
+    @staticmethod
+    def _log_group_ignored(message: Dict[str, Any], label: str, sender_key: str = "SenderWxid"):
+        """记录被忽略的群聊消息
+
+        Args:
+            message: 消息
+            label: 日志中显示的消息类型
+            sender_key: 消息中发送人wxid所在的字段
+        """
+        logger.info("收到群聊{}消息: 消息ID:{} 来自:{} 发送人:{} - 已忽略",
+                    label, message.get("MsgId", ""), message["FromWxid"], message[sender_key])
+
     async def process_message(self, message: Dict[str, Any]):
         """处理接收到的消息"""
 
@@ -442,60 +863,37 @@ class XYBot:
         # 确保 FromWxid 始终是字符串，默认为空字符串
         from_user = message.get("FromUserName", {})
         if isinstance(from_user, dict):
-            message["FromWxid"] = from_user.get("string", "")
+            message["FromWxid"] = _intern_wxid(from_user.get("string", ""))
         else:
-            message["FromWxid"] = str(from_user) if from_user else ""
+            message["FromWxid"] = _intern_wxid(str(from_user)) if from_user else ""
         message.pop("FromUserName", None)
 
         # 确保 ToWxid 始终是字符串，默认为空字符串
         to_wxid = message.get("ToWxid", {})
         if isinstance(to_wxid, dict):
-            message["ToWxid"] = to_wxid.get("string", "")
+            message["ToWxid"] = _intern_wxid(to_wxid.get("string", ""))
         else:
-            message["ToWxid"] = str(to_wxid) if to_wxid else ""
+            message["ToWxid"] = _intern_wxid(str(to_wxid)) if to_wxid else ""
 
         # 处理一下自己发的消息
         to_wxid = message.get("ToWxid", "")
-        if message.get("FromWxid") == self.wxid and isinstance(to_wxid, str) and to_wxid.endswith("@chatroom"):
+        if message.get("FromWxid") == self.wxid and isinstance(to_wxid, str) and to_wxid.endswith(_CHATROOM_SUFFIX):
             message["FromWxid"], message["ToWxid"] = message["ToWxid"], message["FromWxid"]
 
-        # 异步更新发送者联系人信息
+        # 是否为群聊消息只需判断一次，后续处理直接使用
         from_wxid = message.get("FromWxid", "")
+        message["_IsGroup"] = from_wxid.endswith(_CHATROOM_SUFFIX)
+
+        # 异步更新发送者联系人信息，群聊只更新群聊本身信息，私聊更新发送者信息
         if from_wxid and from_wxid != self.wxid:
-            # 如果是群聊，只更新群聊本身信息
-            if from_wxid.endswith("@chatroom"):
-                logger.info(f"开始异步更新群聊信息: {from_wxid}")
-                update_task = asyncio.create_task(self.update_contact_info(from_wxid))
-                # 添加回调以记录完成状态
-                update_task.add_done_callback(
-                    lambda t: logger.info(f"完成群聊信息更新: {from_wxid}, 状态: {'success' if not t.exception() else f'error: {t.exception()}'}")
-                )
-            # 如果是私聊，更新发送者信息
-            elif not from_wxid.endswith("@chatroom"):
-                logger.info(f"开始异步更新发送者联系人信息: {from_wxid}")
-                update_task = asyncio.create_task(self.update_contact_info(from_wxid))
-                # 添加回调以记录完成状态
-                update_task.add_done_callback(
-                    lambda t: logger.info(f"完成发送者联系人信息更新: {from_wxid}, 状态: {'success' if not t.exception() else f'error: {t.exception()}'}")
-                )
+            self._queue_contact_update(from_wxid)
 
         # 根据消息类型触发不同的事件
-        if msg_type == 1:  # 文本消息
-            await self.process_text_message(message)
-        elif msg_type == 3:  # 图片消息
-            await self.process_image_message(message)
-        elif msg_type == 34:  # 语音消息
-            await self.process_voice_message(message)
-        elif msg_type == 43:  # 视频消息
-            await self.process_video_message(message)
-        elif msg_type == 47:  # 表情消息
-            await self.process_emoji_message(message)
-        elif msg_type == 49:  # xml消息
-            await self.process_xml_message(message)
-        elif msg_type == 10002:  # 系统消息
-            await self.process_system_message(message)
+        handler = self._handlers.get(msg_type)
+        if handler is not None:
+            await handler(message)
         elif msg_type == 37:  # 好友请求
-            if self.ignore_protection or not protector.check(14400):
+            if not self._in_protection():
                 await EventManager.emit("friend_request", self.bot, message)
             else:
                 logger.warning("风控保护: 新设备登录后4小时内请挂机")
@@ -508,17 +906,16 @@ class XYBot:
         """处理文本消息"""
         message["Content"] = message.get("Content", {}).get("string", "")
 
-        if message["FromWxid"].endswith("@chatroom"):  # 群聊消息
+        if message["_IsGroup"]:  # 群聊消息
             message["IsGroup"] = True
-            split_content = message["Content"].split(":\n", 1)
-            if len(split_content) > 1:
-                message["Content"] = split_content[1]
-                message["SenderWxid"] = split_content[0]
+            sender_wxid, separator, content = message["Content"].partition(_SENDER_SEP_NEWLINE)
+            if separator:
+                message["Content"] = content
+                message["SenderWxid"] = _intern_wxid(sender_wxid)
 
                 # 不更新群聊中发送者的联系人信息
                 # 根据需求，只更新群聊本身信息，不更新群聊中发送者信息
             else:
-                message["Content"] = split_content[0]
                 message["SenderWxid"] = self.wxid
         else:
             message["SenderWxid"] = message["FromWxid"]
@@ -527,23 +924,16 @@ class XYBot:
             message["IsGroup"] = False
 
         try:
-            root = ET.fromstring(message.get("MsgSource", ""))
-            ats = root.find("atuserlist").text if root.find("atuserlist") is not None else ""
+            message["Ats"] = _parse_ats(message.get("MsgSource", ""))
         except Exception as e:
             logger.error("解析文本消息失败: {}", e)
-            ats = ""
-
-        if ats:
-            ats = ats.strip(",").split(",")
-        else:
-            ats = []
-        message["Ats"] = ats if ats and ats[0] != "" else []
+            message["Ats"] = []
 
-        await self.msg_db.save_message(
-            msg_id=int(message.get("MsgId", 0)),
+        self._queue_message_save(
+            msg_id=_to_int(message.get("MsgId", 0)),
             sender_wxid=message["SenderWxid"],
             from_wxid=message["FromWxid"],
-            msg_type=int(message.get("MsgType", 0)),
+            msg_type=_to_int(message.get("MsgType", 0)),
             content=message["Content"],
             is_group=message["IsGroup"]
         )
@@ -553,13 +943,8 @@ class XYBot:
             logger.info("收到被@消息: 消息ID:{} 来自:{} 发送人:{} @:{} 内容:{}",
                         message.get("MsgId", ""), message["FromWxid"],
                         message["SenderWxid"], message["Ats"], message["Content"])
-            if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-                if self.ignore_protection or not protector.check(14400):
-                    # 同时触发at_message和text_message事件，确保插件可以正常工作
-                    await EventManager.emit("at_message", self.bot, message)
-                    await EventManager.emit("text_message", self.bot, message)
-                else:
-                    logger.warning("风控保护: 新设备登录后4小时内请挂机")
+            # 同时触发at_message和text_message事件，确保插件可以正常工作
+            await self._emit_checked(message, "at_message", "text_message")
             return
         
         # 检查是否为群聊消息但机器人未被@
@@ -575,27 +960,22 @@ class XYBot:
                     message.get("MsgId", ""), message["FromWxid"],
                     message["SenderWxid"], message["Content"])
 
-        if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-            if self.ignore_protection or not protector.check(14400):
-                await EventManager.emit("text_message", self.bot, message)
-            else:
-                logger.warning("风控保护: 新设备登录后4小时内请挂机")
+        await self._emit_checked(message, "text_message")
 
     async def process_image_message(self, message: Dict[str, Any]):
         """处理图片消息"""
         message["Content"] = message.get("Content", {}).get("string", "").replace("\n", "").replace("\t", "")
 
-        if message["FromWxid"].endswith("@chatroom"):
+        if message["_IsGroup"]:
             message["IsGroup"] = True
-            split_content = message["Content"].split(":", 1)
-            if len(split_content) > 1:
-                message["Content"] = split_content[1]
-                message["SenderWxid"] = split_content[0]
+            sender_wxid, separator, content = message["Content"].partition(_SENDER_SEP)
+            if separator:
+                message["Content"] = content
+                message["SenderWxid"] = _intern_wxid(sender_wxid)
 
                 # 不更新群聊中发送者的联系人信息
                 # 根据需求，只更新群聊本身信息，不更新群聊中发送者信息
             else:
-                message["Content"] = split_content[0]
                 message["SenderWxid"] = self.wxid
         else:
             message["SenderWxid"] = message["FromWxid"]
@@ -607,72 +987,110 @@ class XYBot:
                     message.get("MsgId", ""), message["FromWxid"],
                     message["SenderWxid"], message["Content"])
 
-        await self.msg_db.save_message(
-            msg_id=int(message.get("MsgId", 0)),
+        self._queue_message_save(
+            msg_id=_to_int(message.get("MsgId", 0)),
             sender_wxid=message["SenderWxid"],
             from_wxid=message["FromWxid"],
-            msg_type=int(message.get("MsgType", 0)),
+            msg_type=_to_int(message.get("MsgType", 0)),
             content=message.get("MsgSource", ""),
             is_group=message["IsGroup"]
         )
 
+        # 群聊图片消息不交给插件处理，无需下载图片
+        if message["IsGroup"]:
+            self._log_group_ignored(message, "图片")
+            return
+
         aeskey, cdnmidimgurl, length, md5 = None, None, None, None
         try:
-            root = ET.fromstring(message["Content"])
-            img_element = root.find('img')
-            if img_element is not None:
-                aeskey = img_element.get('aeskey')
-                cdnmidimgurl = img_element.get('cdnmidimgurl')
-                length = img_element.get('length')
-                md5 = img_element.get('md5')
-                logger.debug(f"解析图片XML成功: aeskey={aeskey}, length={length}, md5={md5}")
+            # 优先用正则直接提取img属性，未匹配时再完整解析XML
+            img_attrs = _parse_img_attrs(message["Content"])
+            if img_attrs is None:
+                img_element = _parse_xml(message["Content"]).find('img')
+                img_attrs = img_element.attrib if img_element is not None else None
+            if img_attrs is not None:
+                aeskey = img_attrs.get('aeskey')
+                cdnmidimgurl = img_attrs.get('cdnmidimgurl')
+                length = img_attrs.get('length')
+                md5 = img_attrs.get('md5')
+                logger.debug("解析图片XML成功: aeskey={}, length={}, md5={}", aeskey, length, md5)
         except Exception as e:
             logger.error("解析图片消息失败: {}, 内容: {}", e, message["Content"])
             return
 
+        try:
+            img_length = int(length) if length else 0
+        except ValueError:
+            img_length = 0
+
+        if img_length > _MAX_IMAGE_BYTES:
+            logger.warning("图片大小异常: {} 字节，超过分段下载上限，改用download_image", img_length)
+
         # 尝试使用新的get_msg_image方法分段下载图片
         try:
-            if length and length.isdigit():
-                img_length = int(length)
-                logger.debug(f"尝试使用get_msg_image下载图片: MsgId={message.get('MsgId')}, length={img_length}")
+            if 0 < img_length <= _MAX_IMAGE_BYTES:
+                # 各段请求共用的参数，避免每段重复从消息中读取
+                msg_id = message.get('MsgId')
+                from_wxid = message["FromWxid"]
+                logger.debug("尝试使用get_msg_image下载图片: MsgId={}, length={}", msg_id, img_length)
 
                 # 分段下载图片
+                # 必须与 get_msg_image 内部的分段大小（64KB）一致，否则各段数据会错位
                 chunk_size = 64 * 1024  # 64KB
                 chunks = (img_length + chunk_size - 1) // chunk_size  # 向上取整
-                full_image_data = bytearray()
-
-                logger.info(f"开始分段下载图片，总大小: {img_length} 字节，分 {chunks} 段下载")
+                full_image_data = bytearray(img_length)  # 总大小已知，预先分配缓冲区
+
+                logger.info("开始分段下载图片，总大小: {} 字节，分 {} 段下载", img_length, chunks)
+
+                # 各段并发下载，限制同时进行的请求数
+                semaphore = asyncio.Semaphore(8)
+
+                async def fetch_chunk(index: int) -> int:
+                    offset = index * chunk_size
+                    expected_size = min(chunk_size, img_length - offset)
+                    async with semaphore:
+                        chunk_data = await self.bot.get_msg_image(msg_id, from_wxid, img_length, start_pos=offset)
+                    if not chunk_data:
+                        raise ValueError("数据为空")
+                    # 长度不符说明数据不完整，不能写入缓冲区
+                    if len(chunk_data) != expected_size:
+                        raise ValueError(f"大小异常: {len(chunk_data)} 字节，应为 {expected_size} 字节")
+                    # 各段写入互不重叠的区间，下载完成即可按偏移写入
+                    full_image_data[offset:offset + expected_size] = chunk_data
+                    logger.debug("第 {}/{} 段下载成功，大小: {} 字节", index + 1, chunks, expected_size)
+                    return expected_size
+
+                tasks = [asyncio.create_task(fetch_chunk(i)) for i in range(chunks)]
+                _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+                if pending:
+                    # 已有段失败，取消其余请求，尽快改用download_image
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
 
                 download_success = True
-                for i in range(chunks):
-                    try:
-                        # 下载当前段
-                        start_pos = i * chunk_size
-                        chunk_data = await self.bot.get_msg_image(message.get('MsgId'), message["FromWxid"], img_length, start_pos=start_pos)
-                        if chunk_data and len(chunk_data) > 0:
-                            full_image_data.extend(chunk_data)
-                            logger.debug(f"第 {i+1}/{chunks} 段下载成功，大小: {len(chunk_data)} 字节")
-                        else:
-                            logger.error(f"第 {i+1}/{chunks} 段下载失败，数据为空")
-                            download_success = False
-                            break
-                    except Exception as e:
-                        logger.error(f"下载第 {i+1}/{chunks} 段时出错: {e}")
+                downloaded_size = 0
+                for i, task in enumerate(tasks):
+                    if task.cancelled():
+                        download_success = False
+                        continue
+                    error = task.exception()
+                    if error is not None:
+                        logger.error("下载第 {}/{} 段时出错: {}", i + 1, chunks, error)
                         download_success = False
-                        break
+                        continue
+                    downloaded_size += task.result()
 
-                if download_success and len(full_image_data) > 0:
+                if download_success and downloaded_size > 0:
                     # 验证图片数据
                     try:
-                        import base64
-                        from PIL import Image, ImageFile
-                        ImageFile.LOAD_TRUNCATED_IMAGES = True  # 允许加载截断的图片
-
-                        image_data = bytes(full_image_data)
-                        # 验证图片数据
-                        Image.open(io.BytesIO(image_data))
-                        message["Content"] = base64.b64encode(image_data).decode('utf-8')
-                        logger.info(f"分段下载图片成功，总大小: {len(image_data)} 字节")
+                        # 只校验文件头，无需通过PIL解析图片
+                        if not _is_image(full_image_data):
+                            raise ValueError(f"未知的图片格式，文件头: {bytes(full_image_data[:12]).hex()}")
+                        # 插件按字符串处理图片内容，这里仍需编码；base64结果只含ASCII字符
+                        # b64encode 直接接受 bytearray，无需再复制为 bytes
+                        message["Content"] = _b64encode(full_image_data).decode('ascii')
+                        logger.info("分段下载图片成功，总大小: {} 字节", img_length)
                     except Exception as img_error:
                         logger.error(f"验证分段下载的图片数据失败: {img_error}")
                         # 如果验证失败，尝试使用download_image
@@ -680,7 +1098,7 @@ class XYBot:
                             logger.warning("尝试使用download_image下载图片")
                             message["Content"] = await self.bot.download_image(aeskey, cdnmidimgurl)
                 else:
-                    logger.warning(f"分段下载图片失败，已下载: {len(full_image_data)}/{img_length} 字节")
+                    logger.warning("分段下载图片失败，已下载: {}/{} 字节", downloaded_size, img_length)
                     # 如果分段下载失败，尝试使用download_image
                     if aeskey and cdnmidimgurl:
                         logger.warning("尝试使用download_image下载图片")
@@ -696,36 +1114,23 @@ class XYBot:
                 except Exception as e2:
                     logger.error(f"备用方法下载图片也失败: {e2}")
 
-        # 群聊消息：只有私聊或者群聊中被@才处理
-        if message["IsGroup"]:
-            # 群聊中的图片消息暂时不处理@检测，因为图片消息中通常没有@信息
-            # 但为了安全起见，群聊中的图片消息不做处理，避免机器人对所有图片都回应
-            logger.info("收到群聊图片消息: 消息ID:{} 来自:{} 发送人:{} - 已忽略",
-                        message.get("MsgId", ""), message["FromWxid"], message["SenderWxid"])
-            return
-
         # 处理私聊图片消息
-        if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-            if self.ignore_protection or not protector.check(14400):
-                await EventManager.emit("image_message", self.bot, message)
-            else:
-                logger.warning("风控保护: 新设备登录后4小时内请挂机")
+        await self._emit_checked(message, "image_message")
 
     async def process_voice_message(self, message: Dict[str, Any]):
         """处理语音消息"""
         message["Content"] = message.get("Content", {}).get("string", "").replace("\n", "").replace("\t", "")
 
-        if message["FromWxid"].endswith("@chatroom"):
+        if message["_IsGroup"]:
             message["IsGroup"] = True
-            split_content = message["Content"].split(":", 1)
-            if len(split_content) > 1:
-                message["Content"] = split_content[1]
-                message["SenderWxid"] = split_content[0]
+            sender_wxid, separator, content = message["Content"].partition(_SENDER_SEP)
+            if separator:
+                message["Content"] = content
+                message["SenderWxid"] = _intern_wxid(sender_wxid)
 
                 # 不更新群聊中发送者的联系人信息
                 # 根据需求，只更新群聊本身信息，不更新群聊中发送者信息
             else:
-                message["Content"] = split_content[0]
                 message["SenderWxid"] = self.wxid
         else:
             message["SenderWxid"] = message["FromWxid"]
@@ -737,19 +1142,24 @@ class XYBot:
                     message.get("MsgId", ""), message["FromWxid"],
                     message["SenderWxid"], message["Content"])
 
-        await self.msg_db.save_message(
-            msg_id=int(message.get("MsgId", 0)),
+        self._queue_message_save(
+            msg_id=_to_int(message.get("MsgId", 0)),
             sender_wxid=message["SenderWxid"],
             from_wxid=message["FromWxid"],
-            msg_type=int(message.get("MsgType", 0)),
+            msg_type=_to_int(message.get("MsgType", 0)),
             content=message["Content"],
             is_group=message["IsGroup"]
         )
 
-        if message["IsGroup"] or not message.get("ImgBuf", {}).get("buffer", ""):
+        # 群聊语音消息不交给插件处理，无需下载语音
+        if message["IsGroup"]:
+            self._log_group_ignored(message, "语音")
+            return
+
+        if not message.get("ImgBuf", {}).get("buffer", ""):
             voiceurl, length = None, None
             try:
-                root = ET.fromstring(message["Content"])
+                root = _parse_xml(message["Content"])
                 voicemsg_element = root.find('voicemsg')
                 if voicemsg_element is not None:
                     voiceurl = voicemsg_element.get('voiceurl')
@@ -765,36 +1175,23 @@ class XYBot:
             silk_base64 = message.get("ImgBuf", {}).get("buffer", "")
             message["Content"] = await self.bot.silk_base64_to_wav_byte(silk_base64)
 
-        # 群聊消息：只有私聊或者群聊中被@才处理
-        if message["IsGroup"]:
-            # 群聊中的语音消息暂时不处理@检测，因为语音消息中通常没有@信息
-            # 但为了安全起见，群聊中的语音消息不做处理，避免机器人对所有语音都回应
-            logger.info("收到群聊语音消息: 消息ID:{} 来自:{} 发送人:{} - 已忽略",
-                        message.get("MsgId", ""), message["FromWxid"], message["SenderWxid"])
-            return
-
         # 处理私聊语音消息
-        if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-            if self.ignore_protection or not protector.check(14400):
-                await EventManager.emit("voice_message", self.bot, message)
-            else:
-                logger.warning("风控保护: 新设备登录后4小时内请挂机")
+        await self._emit_checked(message, "voice_message")
 
     async def process_emoji_message(self, message: Dict[str, Any]):
         """处理表情消息"""
         message["Content"] = message.get("Content", {}).get("string", "").replace("\n", "").replace("\t", "")
 
-        if message["FromWxid"].endswith("@chatroom"):  # 群聊消息
+        if message["_IsGroup"]:  # 群聊消息
             message["IsGroup"] = True
-            split_content = message["Content"].split(":\n", 1)
-            if len(split_content) > 1:
-                message["Content"] = split_content[1]
-                message["ActualUserWxid"] = split_content[0]
+            sender_wxid, separator, content = message["Content"].partition(_SENDER_SEP_NEWLINE)
+            if separator:
+                message["Content"] = content
+                message["ActualUserWxid"] = _intern_wxid(sender_wxid)
 
                 # 不更新群聊中发送者的联系人信息
                 # 根据需求，只更新群聊本身信息，不更新群聊中发送者信息
             else:
-                message["Content"] = split_content[0]
                 message["ActualUserWxid"] = self.wxid
         else:
             message["ActualUserWxid"] = message["FromWxid"]
@@ -806,45 +1203,32 @@ class XYBot:
                     message.get("MsgId", ""), message["FromWxid"],
                     message["ActualUserWxid"], message["Content"])
 
-        await self.msg_db.save_message(
-            msg_id=int(message.get("MsgId", 0)),
+        self._queue_message_save(
+            msg_id=_to_int(message.get("MsgId", 0)),
             sender_wxid=message["ActualUserWxid"],
             from_wxid=message["FromWxid"],
-            msg_type=int(message.get("MsgType", 0)),
+            msg_type=_to_int(message.get("MsgType", 0)),
             content=message["Content"],
             is_group=message["IsGroup"]
         )
 
-        # 群聊消息：只有私聊或者群聊中被@才处理
-        if message["IsGroup"]:
-            # 群聊中的表情消息暂时不处理@检测，因为表情消息中通常没有@信息
-            # 但为了安全起见，群聊中的表情消息不做处理，避免机器人对所有表情都回应
-            logger.info("收到群聊表情消息: 消息ID:{} 来自:{} 发送人:{} - 已忽略",
-                        message.get("MsgId", ""), message["FromWxid"], message["ActualUserWxid"])
-            return
-
-        # 处理私聊表情消息
-        if self.ignore_check(message["FromWxid"], message["ActualUserWxid"]):
-            if self.ignore_protection or not protector.check(14400):
-                await EventManager.emit("emoji_message", self.bot, message)
-            else:
-                logger.warning("风控保护: 新设备登录后4小时内请挂机")
+        # 群聊消息暂不处理，避免机器人对群里所有表情消息都回应；私聊消息触发事件
+        await self._emit_private(message, "emoji_message", "表情", sender_key="ActualUserWxid")
 
     async def process_xml_message(self, message: Dict[str, Any]):
         """处理xml消息"""
         message["Content"] = message.get("Content", {}).get("string", "").replace("\n", "").replace("\t", "")
 
-        if message["FromWxid"].endswith("@chatroom"):
+        if message["_IsGroup"]:
             message["IsGroup"] = True
-            split_content = message["Content"].split(":", 1)
-            if len(split_content) > 1:
-                message["Content"] = split_content[1]
-                message["SenderWxid"] = split_content[0]
+            sender_wxid, separator, content = message["Content"].partition(_SENDER_SEP)
+            if separator:
+                message["Content"] = content
+                message["SenderWxid"] = _intern_wxid(sender_wxid)
 
                 # 不更新群聊中发送者的联系人信息
                 # 根据需求，只更新群聊本身信息，不更新群聊中发送者信息
             else:
-                message["Content"] = split_content[0]
                 message["SenderWxid"] = self.wxid
         else:
             message["SenderWxid"] = message["FromWxid"]
@@ -853,17 +1237,21 @@ class XYBot:
             message["IsGroup"] = False
 
         # 保存消息到数据库（即使解析失败也保存）
-        await self.msg_db.save_message(
-            msg_id=int(message.get("MsgId", 0)),
+        self._queue_message_save(
+            msg_id=_to_int(message.get("MsgId", 0)),
             sender_wxid=message["SenderWxid"],
             from_wxid=message["FromWxid"],
-            msg_type=int(message.get("MsgType", 0)),
+            msg_type=_to_int(message.get("MsgType", 0)),
             content=message["Content"],
             is_group=message["IsGroup"]
         )
 
+        if not _looks_like_xml(message["Content"]):
+            logger.warning("XML 消息内容不是 XML 格式，已忽略: {}", message["Content"])
+            return
+
         try:
-            root = ET.fromstring(message["Content"])
+            root = _parse_xml(message["Content"])
             appmsg = root.find("appmsg")
             if appmsg is None:
                 logger.warning("XML 中未找到 appmsg 节点，内容: {}", message["Content"])
@@ -874,7 +1262,7 @@ class XYBot:
                 return
             type_value = int(type_element.text)
             logger.debug("解析到的 XML 类型: {}, 完整内容: {}", type_value, message["Content"])
-        except ET.ParseError as e:
+        except _XML_PARSE_ERRORS as e:
             logger.error("解析 XML 失败: {}, 完整内容: {}", e, message["Content"])
             return
         except Exception as e:
@@ -882,55 +1270,38 @@ class XYBot:
             return
 
         if type_value == 57:  # 引用消息
-            await self.process_quote_message(message)
+            await self.process_quote_message(message, root)
         elif type_value == 6:  # 文件消息
             # 先触发 xml_message 事件，再处理文件消息
-            if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-                if self.ignore_protection or not protector.check(14400):
-                    logger.debug("触发文件消息的 xml_message 事件: 消息ID: {}", message.get("MsgId", ""))
-                    await EventManager.emit("xml_message", self.bot, message)
-                else:
-                    logger.warning("风控保护: 新设备登录后4小时内请挂机")
+            await self._emit_checked(message, "xml_message")
 
             # 然后处理文件消息
-            await self.process_file_message(message)
+            await self.process_file_message(message, root)
         elif type_value == 5:  # 公众号文章或链接分享消息
             logger.info("收到链接分享消息: 消息ID:{} 来自:{} 发送人:{} XML:{}",
                         message.get("MsgId", ""), message["FromWxid"],
                         message["SenderWxid"], message["Content"])
             logger.debug("完整 XML 内容: {}", message["Content"])
-            if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-                if self.ignore_protection or not protector.check(14400):
-                    logger.debug("触发 article_message 事件: 消息ID: {}", message.get("MsgId", ""))
-                    await EventManager.emit("article_message", self.bot, message)
-                else:
-                    logger.warning("风控保护: 新设备登录后4小时内请挂机")
+            await self._emit_checked(message, "article_message")
         elif type_value == 74:  # 文件消息，但还在上传
             logger.debug("收到上传中文件消息: 消息ID:{} 来自:{}", message.get("MsgId", ""), message["FromWxid"])
         else:
             logger.info("未知的 XML 消息类型: {}, 完整内容: {}", type_value, message["Content"])
 
-        # 群聊消息：只有私聊或者群聊中被@才处理
-        if message["IsGroup"]:
-            # 群聊中的XML消息（如分享链接、文件等）暂时不处理@检测
-            # 但为了安全起见，群聊中的XML消息不做处理，避免机器人对所有分享都回应
-            logger.info("收到群聊XML消息: 消息ID:{} 来自:{} 发送人:{} - 已忽略",
-                        message.get("MsgId", ""), message["FromWxid"], message["SenderWxid"])
-            return
+        # 群聊消息暂不处理，避免机器人对群里所有XML消息都回应；私聊消息触发事件
+        await self._emit_private(message, "xml_message", "XML")
 
-        # 处理私聊XML消息，触发 xml_message 事件，无论 XML 类型如何
-        if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-            if self.ignore_protection or not protector.check(14400):
-                logger.debug("触发 xml_message 事件: 消息ID: {}", message.get("MsgId", ""))
-                await EventManager.emit("xml_message", self.bot, message)
-            else:
-                logger.warning("风控保护: 新设备登录后4小时内请挂机")
+    async def process_quote_message(self, message: Dict[str, Any], root=None):
+        """处理引用消息
 
-    async def process_quote_message(self, message: Dict[str, Any]):
-        """处理引用消息"""
+        Args:
+            message: 消息
+            root: 已解析的消息XML根节点，未提供时重新解析消息内容
+        """
         quote_message = {}
         try:
-            root = ET.fromstring(message["Content"])
+            if root is None:
+                root = _parse_xml(message["Content"])
             appmsg = root.find("appmsg")
             text = appmsg.find("title").text
             refermsg = appmsg.find("refermsg")
@@ -956,34 +1327,11 @@ class XYBot:
 
                 quote_message["Content"] = refermsg.find("content").text
 
-                quote_root = ET.fromstring(quote_message["Content"])
+                quote_root = _parse_xml(quote_message["Content"])
                 quote_appmsg = quote_root.find("appmsg")
 
-                quote_message["Content"] = quote_appmsg.find("title").text if isinstance(quote_appmsg.find("title"), ET.Element) else ""
-                quote_message["destination"] = quote_appmsg.find("des").text if isinstance(quote_appmsg.find("des"), ET.Element) else ""
-                quote_message["action"] = quote_appmsg.find("action").text if isinstance(quote_appmsg.find("action"), ET.Element) else ""
-                quote_message["XmlType"] = int(quote_appmsg.find("type").text) if isinstance(quote_appmsg.find("type"), ET.Element) else 0
-                quote_message["showtype"] = int(quote_appmsg.find("showtype").text) if isinstance(quote_appmsg.find("showtype"), ET.Element) else 0
-                quote_message["soundtype"] = int(quote_appmsg.find("soundtype").text) if isinstance(quote_appmsg.find("soundtype"), ET.Element) else 0
-                quote_message["url"] = quote_appmsg.find("url").text if isinstance(quote_appmsg.find("url"), ET.Element) else ""
-                quote_message["lowurl"] = quote_appmsg.find("lowurl").text if isinstance(quote_appmsg.find("lowurl"), ET.Element) else ""
-                quote_message["dataurl"] = quote_appmsg.find("dataurl").text if isinstance(quote_appmsg.find("dataurl"), ET.Element) else ""
-                quote_message["lowdataurl"] = quote_appmsg.find("lowdataurl").text if isinstance(quote_appmsg.find("lowdataurl"), ET.Element) else ""
-                quote_message["songlyric"] = quote_appmsg.find("songlyric").text if isinstance(quote_appmsg.find("songlyric"), ET.Element) else ""
-                quote_message["appattach"] = {}
-                quote_message["appattach"]["totallen"] = int(quote_appmsg.find("appattach").find("totallen").text) if isinstance(quote_appmsg.find("appattach").find("totallen"), ET.Element) else 0
-                quote_message["appattach"]["attachid"] = quote_appmsg.find("appattach").find("attachid").text if isinstance(quote_appmsg.find("appattach").find("attachid"), ET.Element) else ""
-                quote_message["appattach"]["emoticonmd5"] = quote_appmsg.find("appattach").find("emoticonmd5").text if isinstance(quote_appmsg.find("appattach").find("emoticonmd5"), ET.Element) else ""
-                quote_message["appattach"]["fileext"] = quote_appmsg.find("appattach").find("fileext").text if isinstance(quote_appmsg.find("appattach").find("fileext"), ET.Element) else ""
-                quote_message["appattach"]["cdnthumbaeskey"] = quote_appmsg.find("appattach").find("cdnthumbaeskey").text if isinstance(quote_appmsg.find("appattach").find("cdnthumbaeskey"), ET.Element) else ""
-                quote_message["appattach"]["aeskey"] = quote_appmsg.find("appattach").find("aeskey").text if isinstance(quote_appmsg.find("appattach").find("aeskey"), ET.Element) else ""
-                quote_message["extinfo"] = quote_appmsg.find("extinfo").text if isinstance(quote_appmsg.find("extinfo"), ET.Element) else ""
-                quote_message["sourceusername"] = quote_appmsg.find("sourceusername").text if isinstance(quote_appmsg.find("sourceusername"), ET.Element) else ""
-                quote_message["sourcedisplayname"] = quote_appmsg.find("sourcedisplayname").text if isinstance(quote_appmsg.find("sourcedisplayname"), ET.Element) else ""
-                quote_message["thumburl"] = quote_appmsg.find("thumburl").text if isinstance(quote_appmsg.find("thumburl"), ET.Element) else ""
-                quote_message["md5"] = quote_appmsg.find("md5").text if isinstance(quote_appmsg.find("md5"), ET.Element) else ""
-                quote_message["statextstr"] = quote_appmsg.find("statextstr").text if isinstance(quote_appmsg.find("statextstr"), ET.Element) else ""
-                quote_message["directshare"] = int(quote_appmsg.find("directshare").text) if isinstance(quote_appmsg.find("directshare"), ET.Element) else 0
+                quote_message.update(_extract_fields(quote_appmsg, _QUOTE_APPMSG_FIELDS))
+                quote_message["appattach"] = _extract_fields(quote_appmsg.find("appattach"), _QUOTE_APPATTACH_FIELDS)
 
         except Exception as e:
             logger.error("解析引用消息失败: {}, 完整内容: {}", e, message["Content"])
@@ -1002,23 +1350,14 @@ class XYBot:
             # 如果引用消息或当前消息中包含@机器人，则处理
             try:
                 # 解析@信息
-                root = ET.fromstring(message.get("MsgSource", ""))
-                ats = root.find("atuserlist").text if root.find("atuserlist") is not None else ""
-                if ats:
-                    ats = ats.strip(",").split(",")
-                else:
-                    ats = []
-                
+                ats = _parse_ats(message.get("MsgSource", ""))
+
                 # 检查是否@了机器人
                 if self.wxid in ats:
                     logger.info("收到群聊引用消息(已@机器人): 消息ID:{} 来自:{} 发送人:{} 内容:{} 引用:{}",
                                 message.get("MsgId", ""), message["FromWxid"],
                                 message["SenderWxid"], message["Content"], message["Quote"])
-                    if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-                        if self.ignore_protection or not protector.check(14400):
-                            await EventManager.emit("quote_message", self.bot, message)
-                        else:
-                            logger.warning("风控保护: 新设备登录后4小时内请挂机")
+                    await self._emit_checked(message, "quote_message")
                 else:
                     logger.info("收到群聊引用消息(未@机器人): 消息ID:{} 来自:{} 发送人:{} - 已忽略",
                                 message.get("MsgId", ""), message["FromWxid"], message["SenderWxid"])
@@ -1029,26 +1368,21 @@ class XYBot:
             return
 
         # 处理私聊引用消息
-        if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-            if self.ignore_protection or not protector.check(14400):
-                await EventManager.emit("quote_message", self.bot, message)
-            else:
-                logger.warning("风控保护: 新设备登录后4小时内请挂机")
+        await self._emit_checked(message, "quote_message")
 
     async def process_video_message(self, message):
         message["Content"] = message.get("Content", {}).get("string", "")
 
-        if message["FromWxid"].endswith("@chatroom"):
+        if message["_IsGroup"]:
             message["IsGroup"] = True
-            split_content = message["Content"].split(":", 1)
-            if len(split_content) > 1:
-                message["Content"] = split_content[1]
-                message["SenderWxid"] = split_content[0]
+            sender_wxid, separator, content = message["Content"].partition(_SENDER_SEP)
+            if separator:
+                message["Content"] = content
+                message["SenderWxid"] = _intern_wxid(sender_wxid)
 
                 # 不更新群聊中发送者的联系人信息
                 # 根据需求，只更新群聊本身信息，不更新群聊中发送者信息
             else:
-                message["Content"] = split_content[0]
                 message["SenderWxid"] = self.wxid
         else:
             message["SenderWxid"] = message["FromWxid"]
@@ -1060,36 +1394,35 @@ class XYBot:
                     message.get("MsgId", ""), message["FromWxid"],
                     message["SenderWxid"], message["Content"])
 
-        await self.msg_db.save_message(
-            msg_id=int(message.get("MsgId", 0)),
+        self._queue_message_save(
+            msg_id=_to_int(message.get("MsgId", 0)),
             sender_wxid=message["SenderWxid"],
             from_wxid=message["FromWxid"],
-            msg_type=int(message.get("MsgType", 0)),
+            msg_type=_to_int(message.get("MsgType", 0)),
             content=message["Content"],
             is_group=message["IsGroup"]
         )
 
-        message["Video"] = await self.bot.download_video(message.get("MsgId", 0))
-
-        # 群聊消息：只有私聊或者群聊中被@才处理
+        # 群聊视频消息不交给插件处理，无需下载视频
         if message["IsGroup"]:
-            # 群聊中的视频消息暂时不处理@检测，因为视频消息中通常没有@信息
-            # 但为了安全起见，群聊中的视频消息不做处理，避免机器人对所有视频都回应
-            logger.info("收到群聊视频消息: 消息ID:{} 来自:{} 发送人:{} - 已忽略",
-                        message.get("MsgId", ""), message["FromWxid"], message["SenderWxid"])
+            self._log_group_ignored(message, "视频")
             return
 
+        message["Video"] = await self.bot.download_video(message.get("MsgId", 0))
+
         # 处理私聊视频消息
-        if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-            if self.ignore_protection or not protector.check(14400):
-                await EventManager.emit("video_message", self.bot, message)
-            else:
-                logger.warning("风控保护: 新设备登录后4小时内请挂机")
+        await self._emit_checked(message, "video_message")
+
+    async def process_file_message(self, message: Dict[str, Any], root=None):
+        """处理文件消息
 
-    async def process_file_message(self, message: Dict[str, Any]):
-        """处理文件消息"""
+        Args:
+            message: 消息
+            root: 已解析的消息XML根节点，未提供时重新解析消息内容
+        """
         try:
-            root = ET.fromstring(message["Content"])
+            if root is None:
+                root = _parse_xml(message["Content"])
             filename = root.find("appmsg").find("title").text
             attach_id = root.find("appmsg").find("appattach").find("attachid").text
             file_extend = root.find("appmsg").find("appattach").find("fileext").text
@@ -1104,47 +1437,40 @@ class XYBot:
                     message.get("MsgId", ""), message["FromWxid"],
                     message["SenderWxid"], message["Content"])
 
-        await self.msg_db.save_message(
-            msg_id=int(message.get("MsgId", 0)),
+        self._queue_message_save(
+            msg_id=_to_int(message.get("MsgId", 0)),
             sender_wxid=message["SenderWxid"],
             from_wxid=message["FromWxid"],
-            msg_type=int(message.get("MsgType", 0)),
+            msg_type=_to_int(message.get("MsgType", 0)),
             content=message["Content"],
             is_group=message["IsGroup"]
         )
 
-        message["File"] = await self.bot.download_attach(attach_id)
-
-        # 群聊消息：只有私聊或者群聊中被@才处理
+        # 群聊文件消息不交给插件处理，无需下载文件
         if message["IsGroup"]:
-            # 群聊中的文件消息暂时不处理@检测，因为文件消息中通常没有@信息
-            # 但为了安全起见，群聊中的文件消息不做处理，避免机器人对所有文件都回应
             logger.info("收到群聊文件消息: 消息ID:{} 来自:{} 发送人:{} 文件名:{} - 已忽略",
                         message.get("MsgId", ""), message["FromWxid"], message["SenderWxid"], message.get("Filename", ""))
             return
 
+        message["File"] = await self.bot.download_attach(attach_id)
+
         # 处理私聊文件消息
-        if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-            if self.ignore_protection or not protector.check(14400):
-                await EventManager.emit("file_message", self.bot, message)
-            else:
-                logger.warning("风控保护: 新设备登录后4小时内请挂机")
+        await self._emit_checked(message, "file_message")
 
     async def process_system_message(self, message: Dict[str, Any]):
         """处理系统消息"""
         message["Content"] = message.get("Content", {}).get("string", "")
 
-        if message["FromWxid"].endswith("@chatroom"):
+        if message["_IsGroup"]:
             message["IsGroup"] = True
-            split_content = message["Content"].split(":", 1)
-            if len(split_content) > 1:
-                message["Content"] = split_content[1]
-                message["SenderWxid"] = split_content[0]
+            sender_wxid, separator, content = message["Content"].partition(_SENDER_SEP)
+            if separator:
+                message["Content"] = content
+                message["SenderWxid"] = _intern_wxid(sender_wxid)
 
                 # 不更新群聊中发送者的联系人信息
                 # 根据需求，只更新群聊本身信息，不更新群聊中发送者信息
             else:
-                message["Content"] = split_content[0]
                 message["SenderWxid"] = self.wxid
         else:
             message["SenderWxid"] = message["FromWxid"]
@@ -1152,38 +1478,36 @@ class XYBot:
                 message["FromWxid"] = message["ToWxid"]
             message["IsGroup"] = False
 
+        if not _looks_like_xml(message["Content"]):
+            logger.warning("系统消息内容不是 XML 格式，已忽略: {}", message["Content"])
+            return
+
         try:
-            root = ET.fromstring(message["Content"])
+            root = _parse_xml(message["Content"])
             msg_type = root.attrib["type"]
         except Exception as e:
             logger.error("解析系统消息失败: {}, 内容: {}", e, message["Content"])
             return
 
         if msg_type == "pat":
-            await self.process_pat_message(message)
+            await self.process_pat_message(message, root)
         elif msg_type == "ClientCheckGetExtInfo":
             pass
         else:
             logger.info("收到系统消息: {}, 完整内容: {}", message, message["Content"])
-            # 群聊消息：只有私聊或者群聊中被@才处理
-            if message["IsGroup"]:
-                # 群聊中的系统消息暂时不处理@检测，因为系统消息中通常没有@信息
-                # 但为了安全起见，群聊中的系统消息不做处理，避免机器人对所有系统消息都回应
-                logger.info("收到群聊系统消息: 消息ID:{} 来自:{} 发送人:{} - 已忽略",
-                            message.get("MsgId", ""), message["FromWxid"], message["SenderWxid"])
-                return
+            # 群聊消息暂不处理，避免机器人对群里所有系统消息都回应；私聊消息触发事件
+            await self._emit_private(message, "system_message", "系统")
 
-            # 处理私聊系统消息
-            if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-                if self.ignore_protection or not protector.check(14400):
-                    await EventManager.emit("system_message", self.bot, message)
-                else:
-                    logger.warning("风控保护: 新设备登录后4小时内请挂机")
+    async def process_pat_message(self, message: Dict[str, Any], root=None):
+        """处理拍一拍请求消息
 
-    async def process_pat_message(self, message: Dict[str, Any]):
-        """处理拍一拍请求消息"""
+        Args:
+            message: 消息
+            root: 已解析的系统消息XML根节点，未提供时重新解析消息内容
+        """
         try:
-            root = ET.fromstring(message["Content"])
+            if root is None:
+                root = _parse_xml(message["Content"])
             pat = root.find("pat")
             patter = pat.find("fromusername").text
             patted = pat.find("pattedusername").text
@@ -1201,11 +1525,11 @@ class XYBot:
                     message["SenderWxid"], message["Patter"],
                     message["Patted"], message["PatSuffix"])
 
-        await self.msg_db.save_message(
-            msg_id=int(message.get("MsgId", 0)),
+        self._queue_message_save(
+            msg_id=_to_int(message.get("MsgId", 0)),
             sender_wxid=message["SenderWxid"],
             from_wxid=message["FromWxid"],
-            msg_type=int(message.get("MsgType", 0)),
+            msg_type=_to_int(message.get("MsgType", 0)),
             content=f"{message['Patter']} 拍了拍 {message['Patted']} {message['PatSuffix']}",
             is_group=message["IsGroup"]
         )
@@ -1220,140 +1544,179 @@ class XYBot:
             return
 
         # 处理私聊拍一拍消息
-        if self.ignore_check(message["FromWxid"], message["SenderWxid"]):
-            if self.ignore_protection or not protector.check(14400):
-                await EventManager.emit("pat_message", self.bot, message)
-            else:
-                logger.warning("风控保护: 新设备登录后4小时内请挂机")
+        await self._emit_checked(message, "pat_message")
 
-    def ignore_check(self, FromWxid: str, SenderWxid: str):
-        # 过滤公众号消息（公众号wxid通常以gh_开头）
-        if SenderWxid and isinstance(SenderWxid, str) and SenderWxid.startswith('gh_'):
-            logger.debug(f"忽略公众号消息: {SenderWxid}")
-            return False
-        if FromWxid and isinstance(FromWxid, str) and FromWxid.startswith('gh_'):
-            logger.debug(f"忽略公众号消息: {FromWxid}")
-            return False
+    def ignore_check(self, FromWxid: str, SenderWxid: str, is_group: Optional[bool] = None):
+        """检查消息是否需要交给插件处理
 
-        # 过滤微信团队和系统通知
-        system_accounts = [
-            'weixin', # 微信团队
-            'filehelper', # 文件传输助手
-            'fmessage', # 朋友推荐通知
-            'medianote', # 语音记事本
-            'floatbottle', # 漂流瓶
-            'qmessage', # QQ离线消息
-            'qqmail', # QQ邮箱提醒
-            'tmessage', # 腾讯新闻
-            'weibo', # 微博推送
-            'newsapp', # 新闻推送
-            'notification_messages', # 服务通知
-            'helper_entry', # 新版微信运动
-            'mphelper', # 公众号助手
-            'brandsessionholder', # 公众号消息
-            'weixinreminder', # 微信提醒
-            'officialaccounts', # 公众平台
-        ]
-
-        # 检查是否是系统账号
-        for account in system_accounts:
-            if (SenderWxid and isinstance(SenderWxid, str) and SenderWxid == account) or \
-               (FromWxid and isinstance(FromWxid, str) and FromWxid == account):
-                logger.debug(f"忽略系统账号消息: {SenderWxid or FromWxid}")
-                return False
-
-        # 检测其他特殊账号特征
-        # 微信支付相关通知
-        if (SenderWxid and isinstance(SenderWxid, str) and 'wxpay' in SenderWxid) or \
-           (FromWxid and isinstance(FromWxid, str) and 'wxpay' in FromWxid):
-            logger.debug(f"忽略微信支付相关消息: {SenderWxid or FromWxid}")
-            return False
+        Args:
+            FromWxid: 消息来源wxid
+            SenderWxid: 发送人wxid
+            is_group: 是否群聊消息，消息处理时已判断过的可直接传入，未提供时根据FromWxid判断
 
-        # 腾讯游戏相关通知
-        if (SenderWxid and isinstance(SenderWxid, str) and ('tencent' in SenderWxid.lower() or 'game' in SenderWxid.lower())) or \
-           (FromWxid and isinstance(FromWxid, str) and ('tencent' in FromWxid.lower() or 'game' in FromWxid.lower())):
-            logger.debug(f"忽略腾讯游戏相关消息: {SenderWxid or FromWxid}")
-            return False
+        Returns:
+            bool: 需要处理返回True，需要忽略返回False
+        """
+        if is_group is None:
+            is_group = isinstance(FromWxid, str) and FromWxid.endswith(_CHATROOM_SUFFIX)
 
-        # 其他特殊账号特征
-        # 微信官方账号通常包含"service"或"official"
-        if (SenderWxid and isinstance(SenderWxid, str) and ('service' in SenderWxid.lower() or 'official' in SenderWxid.lower())) or \
-           (FromWxid and isinstance(FromWxid, str) and ('service' in FromWxid.lower() or 'official' in FromWxid.lower())):
-            logger.debug(f"忽略官方服务账号消息: {SenderWxid or FromWxid}")
-            return False
+        try:
+            allowed, reason = self._cached_ignore_decision(FromWxid, SenderWxid, is_group)
+        except TypeError:
+            # 参数不可哈希时无法缓存，直接判断
+            allowed, reason = self._ignore_decision(FromWxid, SenderWxid, is_group)
 
+        # 日志在缓存之外输出，命中缓存时同样会记录
+        if reason is not None:
+            logger.debug(*reason)
+        return allowed
 
+    def _ignore_decision(self, FromWxid: str, SenderWxid: str, is_group: bool) -> tuple:
+        """判断消息是否需要交给插件处理，结果只取决于参数和过滤配置，可以缓存
 
-        # 先检查是否是群聊消息
-        is_group = FromWxid and isinstance(FromWxid, str) and FromWxid.endswith("@chatroom")
+        Args:
+            FromWxid: 消息来源wxid
+            SenderWxid: 发送人wxid
+            is_group: 是否群聊消息
 
-        if self.ignore_mode == "Whitelist":
-            if is_group:
-                # 群聊消息：有两种情况
-                # 1. 群聊ID在白名单中（处理该群中的所有消息）
-                # 2. 发送者ID在白名单中（无论群聊ID是否在白名单中）
-
-                # 当发送者ID在白名单中，或者群聊ID在白名单中时，才处理消息
-                # 修改逻辑，允许处理白名单群聊中的所有消息，而不仅仅是机器人自己发送的消息
-                logger.debug(f"白名单检查: 群聊ID={FromWxid}, 发送者ID={SenderWxid}, 群聊ID在白名单中={FromWxid in self.whitelist}, 发送者ID在白名单中={SenderWxid in self.whitelist}")
-                return SenderWxid in self.whitelist or FromWxid in self.whitelist
-            else:
-                # 私聊消息：发送者ID在白名单中
-                return SenderWxid in self.whitelist
-        elif self.ignore_mode == "Blacklist":
-            if is_group:
-                # 群聊消息：群聊ID不在黑名单中且发送者ID不在黑名单中
-                return (FromWxid not in self.blacklist) and (SenderWxid not in self.blacklist)
-            else:
-                # 私聊消息：发送者ID不在黑名单中
-                return SenderWxid not in self.blacklist
-        else:
-            # 默认处理所有消息
-            return True
+        Returns:
+            tuple: (是否需要处理, 调试日志的格式和参数，无需记录时为None)
+        """
+        # 统一转换为字符串，非字符串的wxid按空字符串处理，后续判断无需再检查类型
+        SenderWxid = SenderWxid if type(SenderWxid) is str else ""
+        FromWxid = FromWxid if type(FromWxid) is str else ""
+
+        # 过滤公众号消息（公众号wxid通常以gh_开头）
+        if SenderWxid.startswith('gh_'):
+            return False, ("忽略公众号消息: {}", SenderWxid)
+        if FromWxid.startswith('gh_'):
+            return False, ("忽略公众号消息: {}", FromWxid)
+
+        # 过滤微信团队和系统通知
+        if not _SYSTEM_ACCOUNTS.isdisjoint((SenderWxid, FromWxid)):
+            return False, ("忽略系统账号消息: {}", SenderWxid or FromWxid)
+
+        # 检测其他特殊账号特征：微信支付、腾讯游戏、微信官方服务账号
+        for wxid in (SenderWxid, FromWxid):
+            if wxid:
+                match = _ACCOUNT_FEATURE_RE.search(wxid)
+                if match:
+                    return False, ("忽略{}消息: {}", _ACCOUNT_FEATURE_LABELS[match.group().lower()],
+                                   SenderWxid or FromWxid)
+
+        return self._check_allowed(FromWxid, SenderWxid, is_group)
+
+    def _check_whitelist(self, FromWxid: str, SenderWxid: str, is_group: bool) -> tuple:
+        """白名单模式的过滤判断，返回值同 _ignore_decision"""
+        if is_group:
+            # 群聊消息：有两种情况
+            # 1. 群聊ID在白名单中（处理该群中的所有消息）
+            # 2. 发送者ID在白名单中（无论群聊ID是否在白名单中）
+
+            # 当发送者ID在白名单中，或者群聊ID在白名单中时，才处理消息
+            # 修改逻辑，允许处理白名单群聊中的所有消息，而不仅仅是机器人自己发送的消息
+            group_allowed = FromWxid in self._whitelist_set
+            sender_allowed = SenderWxid in self._whitelist_set
+            return sender_allowed or group_allowed, (
+                "白名单检查: 群聊ID={}, 发送者ID={}, 群聊ID在白名单中={}, 发送者ID在白名单中={}",
+                FromWxid, SenderWxid, group_allowed, sender_allowed)
+        # 私聊消息：发送者ID在白名单中
+        return SenderWxid in self._whitelist_set, None
+
+    def _check_blacklist(self, FromWxid: str, SenderWxid: str, is_group: bool) -> tuple:
+        """黑名单模式的过滤判断，返回值同 _ignore_decision"""
+        if is_group:
+            # 群聊消息：群聊ID不在黑名单中且发送者ID不在黑名单中
+            return self._blacklist_set.isdisjoint((FromWxid, SenderWxid)), None
+        # 私聊消息：发送者ID不在黑名单中
+        return SenderWxid not in self._blacklist_set, None
+
+    @staticmethod
+    def _check_all(FromWxid: str, SenderWxid: str, is_group: bool) -> tuple:
+        """未设置过滤模式时处理所有消息"""
+        return True, None
 
     # 朋友圈相关方法
-    async def get_friend_circle_list(self, max_id: int = 0) -> dict:
-        """获取自己的朋友圈列表
+    # 以下方法只是转发，直接返回底层协程由调用方await，不再多包一层协程
+    # wxid 在登录后才确定，所以每次调用时读取 self.wxid，而不是在初始化时绑定
+    def get_friend_circle_list(self, max_id: int = 0) -> Awaitable[dict]:
+        """获取自己的朋友圈列表，返回的协程需由调用方await
 
         Args:
             max_id: 朋友圈ID，用于分页获取
 
         Returns:
-            dict: 朋友圈数据
+            Awaitable[dict]: await 后得到朋友圈数据
         """
-        return await self.bot.get_pyq_list(self.wxid, max_id)
+        return self.bot.get_pyq_list(self.wxid, max_id)
 
-    async def get_user_friend_circle(self, wxid: str, max_id: int = 0) -> dict:
-        """获取特定用户的朋友圈
+    def get_user_friend_circle(self, wxid: str, max_id: int = 0) -> Awaitable[dict]:
+        """获取特定用户的朋友圈，返回的协程需由调用方await
 
         Args:
             wxid: 用户wxid
             max_id: 朋友圈ID，用于分页获取
 
         Returns:
-            dict: 朋友圈数据
+            Awaitable[dict]: await 后得到朋友圈数据
         """
-        return await self.bot.get_pyq_detail(wxid=self.wxid, Towxid=wxid, max_id=max_id)
+        return self.bot.get_pyq_detail(wxid=self.wxid, Towxid=wxid, max_id=max_id)
 
-    async def like_friend_circle(self, id: str) -> dict:
-        """点赞朋友圈
+    def like_friend_circle(self, id: str) -> Awaitable[str]:
+        """点赞朋友圈，返回的协程需由调用方await
 
         Args:
             id: 朋友圈ID
 
         Returns:
-            dict: 点赞结果
+            Awaitable[str]: await 后得到点赞结果
         """
-        return await self.bot.put_pyq_comment(wxid=self.wxid, id=id, type=1)
+        return self.bot.put_pyq_comment(wxid=self.wxid, id=id, type=1)
 
-    async def comment_friend_circle(self, id: str, content: str) -> dict:
-        """评论朋友圈
+    def comment_friend_circle(self, id: str, content: str) -> Awaitable[str]:
+        """评论朋友圈，返回的协程需由调用方await
 
         Args:
             id: 朋友圈ID
             content: 评论内容
 
         Returns:
-            dict: 评论结果
+            Awaitable[str]: await 后得到评论结果
         """
-        return await self.bot.put_pyq_comment(wxid=self.wxid, id=id, Content=content, type=2)
\ No newline at end of file
+        return self.bot.put_pyq_comment(wxid=self.wxid, id=id, Content=content, type=2)
+
+    async def like_many(self, ids: List[str], concurrency: int = 8) -> List[str]:
+        """批量点赞朋友圈，并发发送请求
+
+        Args:
+            ids: 朋友圈ID列表
+            concurrency: 最大并发请求数
+
+        Returns:
+            List[str]: 点赞结果，与ids顺序一致
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _like(id: str) -> str:
+            async with sem:
+                return await self.like_friend_circle(id)
+
+        return await asyncio.gather(*(_like(id) for id in ids))
+
+    async def comment_many(self, pairs: List[Tuple[str, str]], concurrency: int = 8) -> List[str]:
+        """批量评论朋友圈，并发发送请求
+
+        Args:
+            pairs: (朋友圈ID, 评论内容) 列表
+            concurrency: 最大并发请求数
+
+        Returns:
+            List[str]: 评论结果，与pairs顺序一致
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _comment(id: str, content: str) -> str:
+            async with sem:
+                return await self.comment_friend_circle(id, content)
+
+        return await asyncio.gather(*(_comment(id, content) for id, content in pairs))
\ No newline at end of file